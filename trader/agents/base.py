@@ -1,19 +1,150 @@
 from abc import ABC, abstractmethod
-from typing import Optional
-from trader.domain.models import Candle, Signal
+from dataclasses import dataclass
+from typing import Optional, List, Sequence, Callable, Tuple
+import numpy as np
+import pandas as pd
+from trader.domain.models import Candle, Signal, to_epoch_ns, from_epoch_ns
+
+
+class CandleBuffer:
+    """Fixed-capacity, column-oriented candle history.
+
+    Every row is written twice (at ``i`` and ``i + capacity``) so the newest
+    ``capacity`` rows always form one contiguous slice: appends are O(1) and
+    windowed reads are zero-copy NumPy views.
+    """
+    COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, capacity: int, extra_columns: Sequence[str] = ()):
+        self.capacity = capacity
+        self.columns = self.COLUMNS + tuple(extra_columns)
+        self._data = {name: np.full(2 * capacity, np.nan) for name in self.columns}
+        self._timestamps = np.zeros(2 * capacity, dtype=np.int64)
+        self._readonly = {name: self._readonly_view(column) for name, column in self._data.items()}
+        self._readonly_timestamps = self._readonly_view(self._timestamps.view('datetime64[ns]'))
+        self._head = 0
+        self._size = 0
+
+    @staticmethod
+    def _readonly_view(array: np.ndarray) -> np.ndarray:
+        view = array.view()
+        view.flags.writeable = False
+        return view
+
+    def __len__(self):
+        return self._size
+
+    def append(self, candle, **extra):
+        i, j = self._head, self._head + self.capacity
+        ts = to_epoch_ns(candle.timestamp)
+        self._timestamps[i] = self._timestamps[j] = ts
+        for name in self.COLUMNS:
+            self._data[name][i] = self._data[name][j] = getattr(candle, name)
+        for name, value in extra.items():
+            self._data[name][i] = self._data[name][j] = value
+
+        self._head = (self._head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
+
+    def _window(self, n: Optional[int]) -> slice:
+        end = self._head + self.capacity
+        n = self._size if n is None else min(n, self._size)
+        return slice(end - n, end)
+
+    def view(self, column: str, n: Optional[int] = None) -> np.ndarray:
+        return self._readonly[column][self._window(n)]
+
+    def timestamps(self, n: Optional[int] = None) -> np.ndarray:
+        return self._readonly_timestamps[self._window(n)]
+
+    def __getitem__(self, index: int) -> dict:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("CandleBuffer index out of range")
+        pos = self._head + self.capacity - self._size + index
+        row = {name: float(self._data[name][pos]) for name in self.columns}
+        row['timestamp'] = from_epoch_ns(self._timestamps[pos])
+        return row
+
+    def to_frame(self, n: Optional[int] = None) -> pd.DataFrame:
+        window = self._window(n)
+        df = pd.DataFrame({name: self._data[name][window] for name in self.columns})
+        df['timestamp'] = self._timestamps[window].view('datetime64[ns]')
+        return df
+
+
+@dataclass
+class Subscription:
+    symbol: str
+    timeframe_minutes: int
+    handler: Callable[[Candle], Optional[Signal]]
+    warm_up: Optional[Callable[[List[Candle]], None]] = None
+    history: int = 0
 
 
 class TradingAgent(ABC):
+    history_size = 5000
+    timeframe_minutes = 1
+    PARAMETERS: Tuple[str, ...] = ()
+
     def __init__(self, name: str, magic_number: int):
         self.name = name
         self.magic_number = magic_number
-        self.history = []
+        self.history = CandleBuffer(self.history_size)
+        self.subscriptions: List[Subscription] = []
 
     @abstractmethod
     def on_market_data(self, candle: Candle) -> Optional[Signal]:
         pass
 
-    def update_history(self, new_closed_candle: dict):
+    def on_signal_dropped(self, signal: Signal):
+        """Called before the next bar when the engine discarded this agent's last signal.
+
+        No order was sent for it. By default the agent carries on as if it had been.
+        """
+        pass
+
+    @property
+    def parameters(self) -> dict:
+        return {name: getattr(self, name) for name in self.PARAMETERS}
+
+    def configure(self, **params):
+        """Overrides tunable parameters. This resets the agent's state, so configure before warming up."""
+        unknown = set(params) - set(self.PARAMETERS)
+        if unknown:
+            raise ValueError(f"{type(self).__name__} has no tunable parameters {sorted(unknown)}")
+        previous = {name: getattr(self, name) for name in params}
+        for name, value in params.items():
+            setattr(self, name, value)
+        try:
+            self.reset()
+        except ValueError:
+            # Rejected combination: keep the agent usable with its previous parameters.
+            for name, value in previous.items():
+                setattr(self, name, value)
+            self.reset()
+            raise
+        return self
+
+    def reset(self):
+        self.history.clear()
+
+    def subscribe(self, symbol: str, timeframe_minutes: int, handler=None, warm_up=None, history: int = 0):
+        self.subscriptions.append(Subscription(symbol, timeframe_minutes, handler or self.on_market_data,
+                                               warm_up, history))
+
+    def watch(self, symbol: str):
+        self.subscribe(symbol, self.timeframe_minutes, self.on_market_data, self.warm_up, self.history.capacity)
+
+    def warm_up(self, candles: List[Candle]):
+        for candle in candles:
+            self.update_history(candle)
+
+    def update_history(self, new_closed_candle: Candle):
         self.history.append(new_closed_candle)
-        if len(self.history) > 5000:
-            self.history.pop(0)
\ No newline at end of file
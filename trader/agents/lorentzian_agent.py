@@ -1,11 +1,23 @@
 import numpy as np
-import pandas as pd
-from typing import Optional, Tuple
-from trader.agents.base import TradingAgent
-from trader.domain.models import Candle, Signal, SignalType
-from trader.core.indicators import TechnicalAnalysis
+from collections import deque
+from typing import Optional, List, Tuple
+from trader.agents.base import TradingAgent, CandleBuffer
+from trader.domain.models import Candle, CandleBatch, Signal, SignalType
+from trader.core.indicators import (StreamingRSI, StreamingWaveTrend, StreamingCCI, StreamingADX, StreamingEMA,
+                                     RationalQuadraticKernel)
+from trader.core.knn import LorentzianFeatureStore, lorentzian_distances, knn_scores
+
+
+def _quiet(*args, **kwargs):
+    pass
+
 
 class LorentzianClassificationAgent(TradingAgent):
+    FEATURES = ('f1', 'f2', 'f3', 'f4', 'f5')
+
+    PARAMETERS = ('neighbors_count', 'max_bars_back', 'lookahead', 'kernel_h', 'kernel_r', 'ema_length',
+                  'adx_threshold', 'sl_pct', 'tp_pct')
+
     def __init__(self, name: str, magic_number: int):
         super().__init__(name, magic_number)
         self.neighbors_count = 8
@@ -14,95 +26,191 @@ class LorentzianClassificationAgent(TradingAgent):
         self.kernel_h = 8.0
         self.kernel_r = 8.0
         self.kernel_x = 25
+        self.ema_length = 200
+        self.adx_threshold = 20
+        self.sl_pct = 0.005
+        self.tp_pct = 0.015
+        self.reset()
+
+    def reset(self):
         self.last_signal_type = None
+        self._signal_type_before = None
+        self.history = CandleBuffer(self.max_bars_back + 100)
+
+        # Rows within the first `ema_length - 1` bars of the retained window never had an
+        # EMA under the old full-window recomputation, so they were never trained on.
+        capacity = self.max_bars_back + 100 - (self.ema_length - 1) - self.lookahead
+        if capacity < self.neighbors_count:
+            raise ValueError(
+                f"{type(self).__name__}: max_bars_back={self.max_bars_back} leaves room for {capacity} training "
+                f"rows after ema_length={self.ema_length} and lookahead={self.lookahead}, fewer than "
+                f"neighbors_count={self.neighbors_count}")
+        self._store = LorentzianFeatureStore(capacity, len(self.FEATURES))
+        self._pending = deque(maxlen=self.lookahead + 1)
+        self._bars_seen = 0
+        self._features = None
+        self._ema_value = np.nan
+
+        self._f1 = StreamingRSI(14)
+        self._f2 = StreamingWaveTrend(chlen=10, avg=21)
+        self._f3 = StreamingCCI(20)
+        self._f4 = StreamingADX(20)
+        self._f5 = StreamingRSI(9)
+        self._ema = StreamingEMA(self.ema_length)
+        self._kernel = RationalQuadraticKernel(self.kernel_h, self.kernel_r, window=100)
+
+    def _calculate_features(self, candle: Candle) -> np.ndarray:
+        return np.array([
+            self._f1.update(candle.close),
+            self._f2.update(candle.high, candle.low, candle.close),
+            self._f3.update(candle.high, candle.low, candle.close),
+            self._f4.update(candle.high, candle.low, candle.close),
+            self._f5.update(candle.close),
+        ])
+
+    def _append_bar(self, candle: Candle) -> Optional[Tuple[np.ndarray, int]]:
+        self.history.append(candle)
+        self._features = self._calculate_features(candle)
+        self._ema_value = self._ema.update(candle.close)
+
+        self._pending.append((self._features, candle.close))
+        self._bars_seen += 1
+        if len(self._pending) > self.lookahead:
+            features, close = self._pending[0]
+            labelled_bar = self._bars_seen - 1 - self.lookahead
+            if labelled_bar >= self.ema_length - 1 and not np.isnan(features).any():
+                label = 1 if candle.close > close else (-1 if candle.close < close else 0)
+                self._store.append(features, label)
+                return features, label
+        return None
 
-    def _calculate_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        TechnicalAnalysis.add_rsi(df, length=14, column_name='f1')
-        TechnicalAnalysis.add_wavetrend(df, chlen=10, avg=21, column_name='f2')
-        TechnicalAnalysis.add_cci(df, length=20, column_name='f3')
-        TechnicalAnalysis.add_adx_value(df, length=20, column_name='f4')
-        TechnicalAnalysis.add_rsi(df, length=9, column_name='f5')
-        TechnicalAnalysis.add_ema(df, length=200, column_name='ema_200')
-        return df
-
-    def _rational_quadratic_kernel(self, source_series: pd.Series, h: float, r: float) -> Tuple[float, float]:
-        current_idx = len(source_series) - 1
-        window_size = min(len(source_series), 100)
-        y_hats = []
-        for target_i in [current_idx, current_idx - 1]:
-            numerator = 0.0
-            denominator = 0.0
-            start_j = max(0, target_i - window_size)
-            for j in range(start_j, target_i + 1):
-                y = source_series.iloc[j]
-                distance_sq = (target_i - j) ** 2
-                weight = (1 + distance_sq / (2 * r * h * h)) ** (-r)
-                numerator += weight * y
-                denominator += weight
-            y_hats.append(numerator / denominator if denominator != 0 else 0.0)
-        return y_hats[0], y_hats[1]
+    def warm_up(self, candles: List[Candle]):
+        for candle in candles:
+            self._append_bar(candle)
 
     def on_market_data(self, candle: Candle) -> Optional[Signal]:
-        self.history.append({
-            'open': candle.open, 'high': candle.high, 'low': candle.low,
-            'close': candle.close, 'volume': candle.volume, 'timestamp': candle.timestamp
-        })
-        if len(self.history) > self.max_bars_back + 100: self.history.pop(0)
+        self._append_bar(candle)
         if len(self.history) < 250: return None
 
-        df = pd.DataFrame(self.history)
-        df = self._calculate_features(df)
-        df.dropna(inplace=True)
-        if len(df) < self.neighbors_count + self.lookahead: return None
-
-        df['future_close'] = df['close'].shift(-self.lookahead)
-        train_df = df.dropna(subset=['future_close']).copy()
-        train_df['label'] = np.where(train_df['future_close'] > train_df['close'], 1,
-                                     np.where(train_df['future_close'] < train_df['close'], -1, 0))
-
-        current_row = df.iloc[-1]
-        feature_cols = ['f1', 'f2', 'f3', 'f4', 'f5']
-        current_feats = current_row[feature_cols].values.astype(float)
-        train_feats = train_df[feature_cols].values.astype(float)
-
-        distances = np.sum(np.log1p(np.abs(train_feats - current_feats)), axis=1)
-        train_df['distance'] = distances
-        train_df.sort_values('distance', ascending=True, inplace=True)
-        neighbors = train_df.iloc[:self.neighbors_count]
-        prediction_score = neighbors['label'].sum()
-
-        price = current_row['close']
-        ema_200 = current_row['ema_200']
-        adx_value = current_row['f4']
+        if len(self._store) < self.neighbors_count or np.isnan(self._features).any(): return None
+
+        prediction_score = self._store.predict(self._features, self.neighbors_count)
+        k_current, k_prev = self._kernel.latest(self.history.view('close')[self.ema_length - 1:])
+        return self._decide(candle, prediction_score, self._ema_value, self._features[3], k_current, k_prev)
+
+    def on_signal_dropped(self, signal: Signal):
+        # last_signal_type tracks the side the agent believes it holds; the dropped order never changed it.
+        self.last_signal_type = self._signal_type_before
+
+    def precompute_signals(self, candles: List[Candle], chunk_size: int = 64) -> List[Optional[Signal]]:
+        """Offline equivalent of calling on_market_data() for every candle.
+
+        The recursive indicators run once over the column arrays, labels come from the
+        closes `lookahead` bars ahead, and the k-NN votes are taken `chunk_size` queries at
+        a time over one masked distance block. Returns one entry per candle, like the
+        streaming path, and leaves the agent in the same state.
+        """
+        batch = CandleBatch.from_candles(candles)
+        n, k, lookahead = len(batch), self.neighbors_count, self.lookahead
+        if n == 0:
+            return []
+        prior_closes = self.history.view('close').copy()
+        close_offset = max(self.ema_length - 1 - (self._bars_seen - len(prior_closes)), 0)
+        warm_rows = len(self.history)
+
+        feats = np.empty((n, len(self.FEATURES)))
+        emas = np.empty(n)
+        f1, f2, f3, f4, f5, ema = self._f1, self._f2, self._f3, self._f4, self._f5, self._ema
+        for i, (high, low, close) in enumerate(zip(batch.high.tolist(), batch.low.tolist(), batch.close.tolist())):
+            feats[i] = (f1.update(close), f2.update(high, low, close), f3.update(high, low, close),
+                        f4.update(high, low, close), f5.update(close))
+            emas[i] = ema.update(close)
+
+        # Bars still waiting for their label, followed by the new ones. Bar j is labelled
+        # (and becomes a training row) when bar j + lookahead closes.
+        waiting = list(self._pending)[len(self._pending) - min(len(self._pending), lookahead):]
+        row_feats = np.concatenate([np.array([f for f, _ in waiting]).reshape(-1, feats.shape[1]), feats])
+        row_closes = np.concatenate([[c for _, c in waiting], batch.close])
+        first_bar = self._bars_seen - len(waiting)
+        labelled = np.arange(len(row_feats) - lookahead)
+        labelled = labelled[(first_bar + labelled >= self.ema_length - 1)
+                            & ~np.isnan(row_feats[labelled]).any(axis=1)]
+        new_labels = np.sign(row_closes[labelled + lookahead] - row_closes[labelled]).astype(np.int64)
+        train_feats = np.asfortranarray(np.concatenate([self._store.features, row_feats[labelled]]))
+        train_labels = np.concatenate([self._store.labels, new_labels])
+        added_at = np.concatenate([np.full(len(self._store), -1), labelled + lookahead - len(waiting)])
+
+        # Rows visible to the query at bar i: the newest `capacity` rows appended by then.
+        hi = np.searchsorted(added_at, np.arange(n), side='right')
+        lo = np.maximum(hi - self._store.capacity, 0)
+        ready = (np.minimum(warm_rows + np.arange(1, n + 1), self.history.capacity) >= 250)
+        ready &= (hi - lo >= k) & ~np.isnan(feats).any(axis=1)
+
+        scores = np.zeros(n, dtype=np.int64)
+        queries = np.flatnonzero(ready)
+        for start in range(0, len(queries), chunk_size):
+            block = queries[start:start + chunk_size]
+            first, last = lo[block[0]], hi[block[-1]]
+            distances = lorentzian_distances(train_feats[None, first:last], feats[block][:, None, :])
+            columns = np.arange(first, last)
+            distances[(columns < lo[block, None]) | (columns >= hi[block, None])] = np.inf
+            scores[block] = knn_scores(distances, train_labels[first:last], k)
+
+        closes = np.concatenate([prior_closes, batch.close])[close_offset:]
+        kernel = self._kernel.batch(closes)
+        kernel_idx = np.arange(n) + len(prior_closes) - close_offset
+
+        for candle in candles[-self.history.capacity:]:
+            self.history.append(candle)
+        for row, label in zip(row_feats[labelled][-self._store.capacity:], new_labels[-self._store.capacity:]):
+            self._store.append(row, label)
+        self._pending.extend(zip(feats[-(lookahead + 1):], batch.close[-(lookahead + 1):].tolist()))
+        self._bars_seen += n
+        self._features = feats[-1]
+        self._ema_value = emas[-1]
+
+        signals = []
+        for i, candle in enumerate(candles):
+            if not ready[i]:
+                signals.append(None)
+                continue
+            signals.append(self._decide(candle, int(scores[i]), emas[i], feats[i, 3],
+                                        kernel[kernel_idx[i]], kernel[kernel_idx[i] - 1], verbose=False))
+        return signals
+
+    def _decide(self, candle: Candle, prediction_score: int, ema_200: float, adx_value: float,
+                k_current: float, k_prev: float, verbose: bool = True) -> Optional[Signal]:
+        log = print if verbose else _quiet
+        price = candle.close
         is_uptrend = price > ema_200
         is_downtrend = price < ema_200
-        is_volatile = adx_value > 20
+        is_volatile = adx_value > self.adx_threshold
 
-        k_current, k_prev = self._rational_quadratic_kernel(df['close'], self.kernel_h, self.kernel_r)
         is_kernel_bullish = k_current > k_prev
         is_kernel_bearish = k_current < k_prev
 
         # DEBUG LOG
-        print(f"\n📊 ANALYSIS [{candle.timestamp.strftime('%H:%M')}]: Score={prediction_score} | ADX={adx_value:.1f} | Kernel={'UP' if is_kernel_bullish else 'DOWN'}")
+        log(f"\n📊 ANALYSIS [{candle.timestamp.strftime('%H:%M')}]: Score={prediction_score} | ADX={adx_value:.1f} | Kernel={'UP' if is_kernel_bullish else 'DOWN'}")
 
         final_signal = None
         if prediction_score > 0:
-            if not is_uptrend: print("   ⛔ Skipped BUY: Price below EMA200")
-            elif not is_kernel_bullish: print("   ⛔ Skipped BUY: Kernel is Bearish")
-            elif not is_volatile: print(f"   ⛔ Skipped BUY: Low Volatility ({adx_value:.1f})")
+            if not is_uptrend: log("   ⛔ Skipped BUY: Price below EMA200")
+            elif not is_kernel_bullish: log("   ⛔ Skipped BUY: Kernel is Bearish")
+            elif not is_volatile: log(f"   ⛔ Skipped BUY: Low Volatility ({adx_value:.1f})")
             else:
                 final_signal = SignalType.BUY
-                print("   ✅ BUY SIGNAL CONFIRMED!")
+                log("   ✅ BUY SIGNAL CONFIRMED!")
         elif prediction_score < 0:
-            if not is_downtrend: print("   ⛔ Skipped SELL: Price above EMA200")
-            elif not is_kernel_bearish: print("   ⛔ Skipped SELL: Kernel is Bullish")
-            elif not is_volatile: print(f"   ⛔ Skipped SELL: Low Volatility ({adx_value:.1f})")
+            if not is_downtrend: log("   ⛔ Skipped SELL: Price above EMA200")
+            elif not is_kernel_bearish: log("   ⛔ Skipped SELL: Kernel is Bullish")
+            elif not is_volatile: log(f"   ⛔ Skipped SELL: Low Volatility ({adx_value:.1f})")
             else:
                 final_signal = SignalType.SELL
-                print("   ✅ SELL SIGNAL CONFIRMED!")
+                log("   ✅ SELL SIGNAL CONFIRMED!")
         else:
-             print("   ⚪ Neutral Prediction (Score 0)")
+             log("   ⚪ Neutral Prediction (Score 0)")
 
+        self._signal_type_before = self.last_signal_type
         if self.last_signal_type == SignalType.BUY:
             if prediction_score < 0 or is_kernel_bearish:
                 self.last_signal_type = None
@@ -120,8 +228,8 @@ class LorentzianClassificationAgent(TradingAgent):
 
     def _create_signal(self, candle: Candle, signal_type: SignalType, is_exit: bool) -> Signal:
         price = candle.close
-        sl_pct = 0.005
-        tp_pct = 0.015
+        sl_pct = self.sl_pct
+        tp_pct = self.tp_pct
         if signal_type == SignalType.BUY:
             sl = round(price * (1 - sl_pct), 2)
             tp = round(price * (1 + tp_pct), 2)
@@ -1,80 +1,141 @@
+from typing import Optional, List, Sequence
 import numpy as np
-from typing import Optional, List, Dict
 from trader.agents.base import TradingAgent
-from trader.domain.models import Candle, Signal, SignalType
+from trader.core.pivots import PivotDetector, pivot_flags
+from trader.domain.models import Candle, CandleBatch, Signal, SignalType
+
+
+def _last_pivots(mask: np.ndarray, prices: np.ndarray, length: int, depth: int) -> np.ndarray:
+    """Per bar, the newest ``depth`` recorded pivot prices (oldest first, NaN-padded)."""
+    levels = prices[np.flatnonzero(mask) - length]
+    counts = np.cumsum(mask)
+    out = np.full((len(mask), depth), np.nan)
+    for column in range(depth):
+        index = counts - depth + column
+        valid = index >= 0
+        out[valid, column] = levels[index[valid]]
+    return out
+
 
 class MultiTimeframeSFPAgent(TradingAgent):
+    htf_timeframe = 15
+    ltf_timeframe = 1
+
+    PARAMETERS = ('htf_pivot_len', 'ltf_pivot_len', 'max_choch_wait_candles', 'risk_reward')
+    # HTF pivots an SFP may sweep, newest last.
+    SFP_PIVOTS = 3
+
     def __init__(self, name: str, magic_number: int):
         super().__init__(name, magic_number)
         self.htf_pivot_len = 5
-        self.htf_pivots_high: List[float] = []
-        self.htf_pivots_low: List[float] = []
-        self.htf_history: List[Candle] = []
         self.ltf_pivot_len = 3
-        self.ltf_history: List[Candle] = []
-        self.ltf_recent_highs: List[Dict] = []
-        self.ltf_recent_lows: List[Dict] = []
-        self.active_setup = None
         self.max_choch_wait_candles = 45
+        self.risk_reward = 2
+        self.reset()
+
+    def reset(self):
+        self.htf_pivots = PivotDetector(self.htf_pivot_len, keep=self.SFP_PIVOTS, dedupe=True)
+        self.ltf_structure = PivotDetector(self.ltf_pivot_len, keep=1)
+        self.active_setup = None
 
     def on_market_data(self, candle: Candle):
         pass
 
+    def watch(self, symbol: str):
+        self.subscribe(symbol, self.htf_timeframe, self.on_htf_candle, self.warm_up_htf, 500)
+        self.subscribe(symbol, self.ltf_timeframe, self.on_ltf_candle, self.warm_up_ltf, 2000)
+
+    def warm_up_htf(self, candles: List[Candle]):
+        for candle in candles:
+            self.on_htf_candle(candle)
+
+    def warm_up_ltf(self, candles: List[Candle]):
+        for candle in candles:
+            self.ltf_structure.update(candle.high, candle.low, candle.timestamp)
+
     def on_htf_candle(self, candle: Candle):
-        self.htf_history.append(candle)
-        if len(self.htf_history) > 200: self.htf_history.pop(0)
-        self._update_htf_pivots()
+        self.htf_pivots.update(candle.high, candle.low)
         if self.active_setup is None:
             self._check_htf_sfp(candle)
 
-    def _update_htf_pivots(self):
-        if len(self.htf_history) < self.htf_pivot_len * 2 + 1: return
-        idx = len(self.htf_history) - 1 - self.htf_pivot_len
-        candidate = self.htf_history[idx]
-        window = self.htf_history[idx - self.htf_pivot_len: idx + self.htf_pivot_len + 1]
-        is_high = all(c.high <= candidate.high for c in window)
-        is_low = all(c.low >= candidate.low for c in window)
-        if is_high:
-            if not self.htf_pivots_high or candidate.high != self.htf_pivots_high[-1]:
-                self.htf_pivots_high.append(candidate.high)
-        if is_low:
-            if not self.htf_pivots_low or candidate.low != self.htf_pivots_low[-1]:
-                self.htf_pivots_low.append(candidate.low)
-
     def _check_htf_sfp(self, candle: Candle):
-        for pivot in self.htf_pivots_high[-3:]:
-            if candle.high > pivot and candle.close < pivot:
+        for pivot in self.htf_pivots.highs:
+            if candle.high > pivot.price and candle.close < pivot.price:
                 self.active_setup = {
-                    'type': 'BEARISH', 'pivot_level': pivot,
+                    'type': 'BEARISH', 'pivot_level': pivot.price,
                     'sfp_candle': candle, 'ltf_candles_passed': 0
                 }
                 return
-        for pivot in self.htf_pivots_low[-3:]:
-            if candle.low < pivot and candle.close > pivot:
+        for pivot in self.htf_pivots.lows:
+            if candle.low < pivot.price and candle.close > pivot.price:
                 self.active_setup = {
-                    'type': 'BULLISH', 'pivot_level': pivot,
+                    'type': 'BULLISH', 'pivot_level': pivot.price,
                     'sfp_candle': candle, 'ltf_candles_passed': 0
                 }
                 return
 
+    def precompute_signals(self, ltf_candles: Sequence[Candle],
+                           htf_candles: Sequence[Candle]) -> List[Optional[Signal]]:
+        """Offline equivalent of a fresh agent driven by ``UnifiedEngine.run`` in MTF mode.
+
+        Pivots, SFP triggers and CHoCH breaks are computed as whole-series arrays; each HTF
+        bar is aligned to the first LTF bar it is fed before with ``searchsorted``. Only the
+        armed setups are walked in order. Resets the agent and returns one entry per LTF candle.
+        """
+        self.reset()
+        ltf, htf = CandleBatch.from_candles(ltf_candles), CandleBatch.from_candles(htf_candles)
+        n = len(ltf)
+        signals: List[Optional[Signal]] = [None] * n
+        if n == 0 or len(htf) == 0:
+            return signals
+
+        # HTF: the pivots visible after each bar and the SFPs it would arm.
+        depth = self.SFP_PIVOTS
+        pivot_highs, pivot_lows = pivot_flags(htf.high, htf.low, self.htf_pivot_len, dedupe=True)
+        recent_highs = _last_pivots(pivot_highs, htf.high, self.htf_pivot_len, depth)
+        recent_lows = _last_pivots(pivot_lows, htf.low, self.htf_pivot_len, depth)
+        swept_high = (htf.high[:, None] > recent_highs) & (htf.close[:, None] < recent_highs)
+        swept_low = (htf.low[:, None] < recent_lows) & (htf.close[:, None] > recent_lows)
+        bearish = swept_high.any(axis=1)
+        triggers = np.flatnonzero(bearish | swept_low.any(axis=1))
+        # HTF bar k is fed right before LTF bar armed_at[k]; bars after the last LTF bar never are.
+        armed_at = np.searchsorted(ltf.timestamp, htf.timestamp[triggers], side='left')
+        triggers, armed_at = triggers[armed_at < n], armed_at[armed_at < n]
+
+        # LTF: the last structure swing after each bar and the closes that break it.
+        structure_highs, structure_lows = pivot_flags(ltf.high, ltf.low, self.ltf_pivot_len)
+        last_high = _last_pivots(structure_highs, ltf.high, self.ltf_pivot_len, 1)[:, 0]
+        last_low = _last_pivots(structure_lows, ltf.low, self.ltf_pivot_len, 1)[:, 0]
+        breaks_up = ltf.close > last_high
+        breaks_down = ltf.close < last_low
+
+        wait = self.max_choch_wait_candles
+        position = 0
+        while True:
+            # The next SFP is armed by the first trigger fed once no setup is active.
+            t = int(np.searchsorted(armed_at, position, side='left'))
+            if t == len(triggers): break
+            k, start = int(triggers[t]), int(armed_at[t])
+            window = (breaks_down if bearish[k] else breaks_up)[start:start + wait]
+            hits = np.flatnonzero(window)
+            if len(hits):
+                j = start + int(hits[0])
+                high, low = last_high[j], last_low[j]
+                signals[j] = self._trade_signal(
+                    ltf[j], SignalType.SELL if bearish[k] else SignalType.BUY, htf[k],
+                    None if np.isnan(high) else float(high), None if np.isnan(low) else float(low))
+                position = j + 1
+            else:
+                # The setup expires on the bar after its last CHoCH check.
+                position = start + wait + 1
+        return signals
+
     def on_ltf_candle(self, candle: Candle) -> Optional[Signal]:
-        self.ltf_history.append(candle)
-        if len(self.ltf_history) > 100: self.ltf_history.pop(0)
-        self.update_ltf_structure()
+        self.ltf_structure.update(candle.high, candle.low, candle.timestamp)
         if self.active_setup:
             return self._check_ltf_choch(candle)
         return None
 
-    def update_ltf_structure(self):
-        if len(self.ltf_history) < self.ltf_pivot_len * 2 + 1: return
-        idx = len(self.ltf_history) - 1 - self.ltf_pivot_len
-        candidate = self.ltf_history[idx]
-        window = self.ltf_history[idx - self.ltf_pivot_len: idx + self.ltf_pivot_len + 1]
-        if all(c.high <= candidate.high for c in window):
-            self.ltf_recent_highs.append({'price': candidate.high, 'time': candidate.timestamp})
-        if all(c.low >= candidate.low for c in window):
-            self.ltf_recent_lows.append({'price': candidate.low, 'time': candidate.timestamp})
-
     def _check_ltf_choch(self, current_candle: Candle) -> Optional[Signal]:
         self.active_setup['ltf_candles_passed'] += 1
         if self.active_setup['ltf_candles_passed'] > self.max_choch_wait_candles:
@@ -82,41 +143,45 @@ class MultiTimeframeSFPAgent(TradingAgent):
             return None
         setup_type = self.active_setup['type']
         if setup_type == 'BEARISH':
-            if not self.ltf_recent_lows: return None
-            last_low_struct = self.ltf_recent_lows[-1]['price']
+            if not self.ltf_structure.lows: return None
+            last_low_struct = self.ltf_structure.lows[-1].price
             if current_candle.close < last_low_struct:
                 return self._execute_trade(current_candle, SignalType.SELL)
         elif setup_type == 'BULLISH':
-            if not self.ltf_recent_highs: return None
-            last_high_struct = self.ltf_recent_highs[-1]['price']
+            if not self.ltf_structure.highs: return None
+            last_high_struct = self.ltf_structure.highs[-1].price
             if current_candle.close > last_high_struct:
                 return self._execute_trade(current_candle, SignalType.BUY)
         return None
 
     def _execute_trade(self, candle: Candle, signal_type: SignalType) -> Signal:
+        highs, lows = self.ltf_structure.highs, self.ltf_structure.lows
+        signal = self._trade_signal(candle, signal_type, self.active_setup['sfp_candle'],
+                                    highs[-1].price if highs else None, lows[-1].price if lows else None)
+        self.active_setup = None
+        return signal
+
+    def _trade_signal(self, candle: Candle, signal_type: SignalType, htf_sfp_candle: Candle,
+                      last_pivot_high: Optional[float], last_pivot_low: Optional[float]) -> Signal:
         entry_price = candle.close
         sl = 0.0
         tp = 0.0
-        htf_sfp_candle = self.active_setup['sfp_candle']
 
         if signal_type == SignalType.SELL:
-            if self.ltf_recent_highs:
-                last_pivot_high = self.ltf_recent_highs[-1]['price']
+            if last_pivot_high is not None:
                 sl = last_pivot_high + (last_pivot_high * 0.0005)
             else:
                 sl = htf_sfp_candle.high + (htf_sfp_candle.high * 0.0005)
             risk = abs(sl - entry_price)
-            tp = entry_price - (risk * 2)
+            tp = entry_price - (risk * self.risk_reward)
         else:
-            if self.ltf_recent_lows:
-                last_pivot_low = self.ltf_recent_lows[-1]['price']
+            if last_pivot_low is not None:
                 sl = last_pivot_low - (last_pivot_low * 0.0005)
             else:
                 sl = htf_sfp_candle.low - (htf_sfp_candle.low * 0.0005)
             risk = abs(entry_price - sl)
-            tp = entry_price + (risk * 2)
+            tp = entry_price + (risk * self.risk_reward)
 
-        self.active_setup = None
         return Signal(
             agent_name=self.name, symbol=candle.symbol, signal_type=signal_type,
             price=entry_price, reason="SFP + LTF Pivot SL", magic_number=self.magic_number,
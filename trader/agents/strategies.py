@@ -1,33 +1,39 @@
-import pandas as pd
-from agents.base import TradingAgent
+from typing import List
+from agents.base import TradingAgent, CandleBuffer
 from domain.models import Candle, Signal, SignalType
-from core.indicators import TechnicalAnalysis
+from core.indicators import StreamingEMA, StreamingRSI, StreamingATR
 
 
 class TrendFollowerAgent(TradingAgent):
 
     def __init__(self, name: str, magic_number: int):
         super().__init__(name, magic_number)
-        self.history = []
+        self.history = CandleBuffer(200)
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self.ema_50 = StreamingEMA(50)
+        self.rsi = StreamingRSI(14)
+        self.atr = StreamingATR(14)
+
+    def _append_bar(self, candle: Candle):
+        self.history.append(candle)
+        ema = self.ema_50.update(candle.close)
+        rsi = self.rsi.update(candle.close)
+        self.atr.update(candle.high, candle.low, candle.close)
+        return ema, rsi
+
+    def warm_up(self, candles: List[Candle]):
+        for candle in candles:
+            self._append_bar(candle)
 
     def on_market_data(self, candle: Candle) -> Signal | None:
-        self.history.append(candle.__dict__)
-
-        if len(self.history) > 200:
-            self.history.pop(0)
+        ema, rsi = self._append_bar(candle)
 
         if len(self.history) < 55: return None
 
-        df = pd.DataFrame(self.history)
-        TechnicalAnalysis.add_ema(df, length=50, column_name='ema_50')
-        TechnicalAnalysis.add_rsi(df, length=14, column_name='rsi')
-        TechnicalAnalysis.add_atr(df, length=14, column_name='atr')
-
-        last_row = df.iloc[-1]
         price = candle.close
-        ema = last_row['ema_50']
-        rsi = last_row['rsi']
-        atr = last_row['atr']
 
         if price > ema and 50 < rsi < 70:
             sl = price - 10
@@ -52,17 +58,25 @@ class PanicSellerAgent(TradingAgent):
 
     def __init__(self, name: str, magic_number: int):
         super().__init__(name, magic_number)
-        self.history = []
+        self.history = CandleBuffer(100)
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self.rsi = StreamingRSI(14)
+
+    def _append_bar(self, candle: Candle) -> float:
+        self.history.append(candle)
+        return self.rsi.update(candle.close)
+
+    def warm_up(self, candles: List[Candle]):
+        for candle in candles:
+            self._append_bar(candle)
 
     def on_market_data(self, candle: Candle) -> Signal | None:
-        self.history.append(candle.__dict__)
-        if len(self.history) > 100: self.history.pop(0)
+        rsi = self._append_bar(candle)
         if len(self.history) < 20: return None
 
-        df = pd.DataFrame(self.history)
-        TechnicalAnalysis.add_rsi(df, length=14)
-        rsi = df['rsi'].iloc[-1]
-
         if rsi > 80:
             return Signal(
                 agent_name=self.name,
@@ -1,17 +1,159 @@
-from typing import List
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Dict, List, Optional, Set, Tuple
 import uuid
-from agents.base import TradingAgent
-from domain.models import Candle, Order
+from agents.base import TradingAgent, Subscription
+from domain.models import Candle, Order, Signal
+
+_worker_agents: Dict[int, TradingAgent] = {}
+_worker_signals: Dict[int, Optional[Signal]] = {}
+
+
+def _init_worker(agents: Dict[int, TradingAgent]):
+    _worker_agents.update(agents)
+
+
+def _run_pinned(agent: TradingAgent, handler: Callable, index: int, candle: Candle, dropped: bool,
+                last_signals: Dict[int, Optional[Signal]]) -> Tuple[float, float, Optional[Signal]]:
+    if dropped and last_signals.get(index) is not None:
+        # The engine discarded the previous signal, so no order went out for it.
+        agent.on_signal_dropped(last_signals[index])
+    started = time.perf_counter()
+    signal = handler(candle)
+    last_signals[index] = signal
+    return started, time.perf_counter(), signal
+
+
+def _call_agent(index: int, method: str, candle: Candle, dropped: bool):
+    agent = _worker_agents[index]
+    return _run_pinned(agent, getattr(agent, method), index, candle, dropped, _worker_signals)
 
 
 class TradingEngine:
-    def __init__(self):
+    """Routes closed bars to subscribed agents, optionally evaluating them concurrently.
+
+    With ``workers > 0`` every agent is pinned to one single-threaded worker (a thread,
+    or a process holding its own copy of the agent), so an agent's state is only ever
+    touched sequentially. Results are collected in subscription order. An agent whose
+    call takes longer than ``time_budget`` seconds from the moment it starts has its
+    signal for that bar dropped, and so does any agent queued behind that call on the
+    same worker, on this bar or a later one, until the call returns. A dropped agent gets ``on_signal_dropped`` on its worker right
+    before its next call, so it can undo state that assumed the order was sent.
+
+    In process mode the workers are forked on the first dispatch: warm agents up first,
+    and do not rely on the parent's copies afterwards.
+    """
+
+    def __init__(self, workers: int = 0, mode: str = 'thread', time_budget: Optional[float] = None):
+        if mode not in ('thread', 'process'):
+            raise ValueError(f"Unknown worker mode: {mode}")
+        self.workers = workers
+        self.mode = mode
+        self.time_budget = time_budget
         self._agents: List[TradingAgent] = []
+        self._routes: Dict[Tuple[str, int], List[Tuple[int, Subscription]]] = {}
+        self._pools = None
+        self._dropped: Set[int] = set()
+        self._last_signals: Dict[int, Optional[Signal]] = {}
+        self._tails: Dict[int, Future] = {}
 
     def register_agent(self, agent: TradingAgent):
+        # Subscriptions are routed at registration, so agents must watch() their symbols first.
+        index = len(self._agents)
         self._agents.append(agent)
+        for sub in agent.subscriptions:
+            self._routes.setdefault((sub.symbol, sub.timeframe_minutes), []).append((index, sub))
         print(f"[System] Agent Registered: {agent.name}")
 
+    def streams(self) -> List[Tuple[str, int]]:
+        # Higher timeframes first, so a bar that closes together with its HTF bar sees the HTF update.
+        return sorted(self._routes, key=lambda key: (key[0], -key[1]))
+
+    def warm_up(self, fetch: Callable[[str, int, int], List[Candle]]):
+        """Fetches each stream's history once (as much as its hungriest subscriber needs)."""
+        for symbol, tf in self.streams():
+            subs = [s for _, s in self._routes[(symbol, tf)] if s.warm_up and s.history > 0]
+            if not subs: continue
+            candles = fetch(symbol, tf, max(s.history for s in subs))
+            print(f"Loaded {len(candles)} candles for {symbol} M{tf}.")
+            for sub in subs:
+                sub.warm_up(candles[-sub.history:])
+
+    def dispatch(self, symbol: str, timeframe_minutes: int, candle: Candle) -> List[Order]:
+        routes = self._routes.get((symbol, timeframe_minutes), ())
+        if self.workers:
+            signals = self._evaluate_parallel(routes, candle)
+        else:
+            signals = [sub.handler(candle) for _, sub in routes]
+        return [self._to_order(signal) for signal in signals if signal]
+
+    def _ensure_pools(self):
+        if self._pools is None:
+            if self.mode == 'process':
+                self._pools = [
+                    ProcessPoolExecutor(max_workers=1, initializer=_init_worker, initargs=(
+                        {i: a for i, a in enumerate(self._agents) if i % self.workers == w},))
+                    for w in range(self.workers)
+                ]
+            else:
+                self._pools = [ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"agent-worker-{w}")
+                               for w in range(self.workers)]
+        return self._pools
+
+    def _evaluate_parallel(self, routes, candle: Candle) -> List[Optional[Signal]]:
+        pools = self._ensure_pools()
+        submitted = time.perf_counter()
+        # A worker runs its calls in order, so each call starts when the previous one on that worker returns.
+        # Only a call the engine gave up on can still be running from an earlier bar.
+        starts: Dict[int, Optional[float]] = {
+            w: submitted if w not in self._tails or self._tails[w].done() else None for w in range(self.workers)}
+        pending = []
+        for index, sub in routes:
+            pool = pools[index % self.workers]
+            dropped = index in self._dropped
+            self._dropped.discard(index)
+            if self.mode == 'process':
+                future = pool.submit(_call_agent, index, sub.handler.__name__, candle, dropped)
+            else:
+                future = pool.submit(_run_pinned, self._agents[index], sub.handler, index, candle, dropped,
+                                     self._last_signals)
+            self._tails[index % self.workers] = future
+            pending.append((index, future))
+
+        signals = []
+        for index, future in pending:
+            worker = index % self.workers
+            if self.time_budget is None:
+                signals.append(future.result()[2])
+                continue
+            start = starts[worker]
+            if start is None:
+                print(f"⏱️ {self._agents[index].name} is queued behind an overrunning agent, signal dropped")
+                self._dropped.add(index)
+                signals.append(None)
+                continue
+            try:
+                started, finished, signal = future.result(
+                    timeout=max(0.0, start + self.time_budget - time.perf_counter()))
+            except FutureTimeout:
+                started, finished, signal = start, None, None
+            if finished is None or finished - started > self.time_budget:
+                # The agent keeps running on its own worker; only this bar's signal is dropped.
+                print(f"⏱️ {self._agents[index].name} exceeded its {self.time_budget * 1000:.0f}ms budget, signal dropped")
+                self._dropped.add(index)
+                signals.append(None)
+            else:
+                signals.append(signal)
+            starts[worker] = finished
+        return signals
+
+    def shutdown(self):
+        if self._pools:
+            for pool in self._pools:
+                pool.shutdown(wait=False, cancel_futures=True)
+            self._pools = None
+            self._tails.clear()
+
     def process_data(self, candle: Candle) -> List[Order]:  # خروجی شد لیست Order
         orders = []
 
@@ -19,21 +161,23 @@ class TradingEngine:
             signal = agent.on_market_data(candle)
 
             if signal:
+                orders.append(self._to_order(signal))
+
+        return orders
+
+    def _to_order(self, signal: Signal) -> Order:
+        new_order = Order(
+            ticket_id=str(uuid.uuid4())[:8],
+            agent_name=signal.agent_name,
+            symbol=signal.symbol,
+            order_type=signal.signal_type,
+            price=signal.price,
+            volume=signal.volume,
+            stop_loss=signal.stop_loss,
+            take_profit=signal.take_profit,
+            magic_number=signal.magic_number,
+            comment=f"Reason: {signal.reason}"
+        )
 
-                new_order = Order(
-                    ticket_id=str(uuid.uuid4())[:8],
-                    agent_name=signal.agent_name,
-                    symbol=signal.symbol,
-                    order_type=signal.signal_type,
-                    price=signal.price,
-                    volume=signal.volume,
-                    stop_loss=signal.stop_loss,
-                    take_profit=signal.take_profit,
-                    magic_number=signal.magic_number,
-                    comment=f"Reason: {signal.reason}"
-                )
-
-                print(f"✅ Signal {signal.agent_name} Converted to Order: {new_order.ticket_id}")
-                orders.append(new_order)
-
-        return orders
\ No newline at end of file
+        print(f"✅ Signal {signal.agent_name} Converted to Order: {new_order.ticket_id}")
+        return new_order
@@ -1,3 +1,9 @@
+import math
+from collections import deque
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
 import pandas as pd
 import pandas_ta as ta
 
@@ -52,4 +58,227 @@ class TechnicalAnalysis:
 
         if wt1 is not None:
             df[column_name] = wt1
-        return df
\ No newline at end of file
+        return df
+
+# --- Streaming indicators -------------------------------------------------
+# Stateful counterparts of the pandas_ta calls above. Each update() consumes one
+# closed bar in O(1) and returns the latest value (NaN while warming up), so the
+# agents no longer have to rebuild a DataFrame over their whole history per bar.
+
+class StreamingEMA:
+    """pandas_ta `ema` (non-TA-Lib path): the first `length` bars seed it with
+    `close[0:length].sum() / length`, so NaNs count as zero there, then
+    ewm(span=length, adjust=False), which decays the last value across NaN gaps."""
+
+    def __init__(self, length: int):
+        self.length = length
+        self.alpha = 2.0 / (length + 1)
+        self.value = math.nan
+        self._bars = 0
+        self._seed_sum = 0.0
+        self._missed = 0
+
+    def update(self, x: float) -> float:
+        self._bars += 1
+        if self._bars <= self.length:
+            if not math.isnan(x):
+                self._seed_sum += x
+            if self._bars == self.length:
+                self.value = self._seed_sum / self.length
+        elif math.isnan(x):
+            self._missed += 1
+        elif self._missed:
+            old_weight = (1.0 - self.alpha) ** (self._missed + 1)
+            self.value = (old_weight * self.value + self.alpha * x) / (old_weight + self.alpha)
+            self._missed = 0
+        else:
+            self.value = self.alpha * x + (1.0 - self.alpha) * self.value
+        return self.value
+
+
+class StreamingRMA:
+    """pandas_ta `rma`: ewm(alpha=1/length, adjust=True, min_periods=length)."""
+
+    def __init__(self, length: int):
+        self.length = length
+        self.decay = 1.0 - 1.0 / length
+        self.value = math.nan
+        self._num = 0.0
+        self._den = 0.0
+        self._count = 0
+
+    def update(self, x: float) -> float:
+        if math.isnan(x):
+            self._num *= self.decay
+            self._den *= self.decay
+        else:
+            self._num = x + self.decay * self._num
+            self._den = 1.0 + self.decay * self._den
+            self._count += 1
+        if self._count >= self.length:
+            self.value = self._num / self._den
+        return self.value
+
+
+class StreamingRSI:
+    def __init__(self, length: int = 14):
+        self.length = length
+        self.value = math.nan
+        self._gain = StreamingRMA(length)
+        self._loss = StreamingRMA(length)
+        self._prev_close = math.nan
+
+    def update(self, close: float) -> float:
+        change = close - self._prev_close
+        self._prev_close = close
+        gain = self._gain.update(max(change, 0.0) if not math.isnan(change) else math.nan)
+        loss = self._loss.update(min(change, 0.0) if not math.isnan(change) else math.nan)
+        if not (math.isnan(gain) or math.isnan(loss)):
+            total = gain + abs(loss)
+            self.value = 100.0 * gain / total if total != 0 else math.nan
+        return self.value
+
+
+class StreamingATR:
+    def __init__(self, length: int = 14):
+        self.length = length
+        self.value = math.nan
+        self._rma = StreamingRMA(length)
+        self._prev_close = math.nan
+
+    def true_range(self, high: float, low: float, close: float) -> float:
+        prev_close = self._prev_close
+        self._prev_close = close
+        if math.isnan(prev_close):
+            return math.nan
+        return max(high - low, abs(high - prev_close), abs(prev_close - low))
+
+    def update(self, high: float, low: float, close: float) -> float:
+        self.value = self._rma.update(self.true_range(high, low, close))
+        return self.value
+
+
+class StreamingCCI:
+    """pandas_ta `cci`: the mean deviation is taken over a `length`-bar ring, so the
+    per-bar cost depends on `length` only, never on how much history is retained."""
+
+    def __init__(self, length: int = 20, c: float = 0.015):
+        self.length = length
+        self.c = c
+        self.value = math.nan
+        self._window = deque(maxlen=length)
+        self._sum = 0.0
+
+    def update(self, high: float, low: float, close: float) -> float:
+        tp = (high + low + close) / 3
+        if len(self._window) == self.length:
+            self._sum -= self._window[0]
+        self._window.append(tp)
+        self._sum += tp
+        if len(self._window) == self.length:
+            mean = self._sum / self.length
+            mad = sum(abs(x - mean) for x in self._window) / self.length
+            self.value = (tp - mean) / (self.c * mad) if mad != 0 else math.nan
+        return self.value
+
+
+class StreamingADX:
+    def __init__(self, length: int = 14):
+        self.length = length
+        self.value = math.nan
+        self._atr = StreamingATR(length)
+        self._plus = StreamingRMA(length)
+        self._minus = StreamingRMA(length)
+        self._adx = StreamingRMA(length)
+        self._prev_high = math.nan
+        self._prev_low = math.nan
+
+    def update(self, high: float, low: float, close: float) -> float:
+        atr = self._atr.update(high, low, close)
+        up = high - self._prev_high
+        dn = self._prev_low - low
+        self._prev_high, self._prev_low = high, low
+
+        if math.isnan(up):
+            plus_dm = minus_dm = math.nan
+        else:
+            plus_dm = up if (up > dn and up > 0) else 0.0
+            minus_dm = dn if (dn > up and dn > 0) else 0.0
+
+        plus = self._plus.update(plus_dm)
+        minus = self._minus.update(minus_dm)
+        dx = math.nan
+        if not math.isnan(atr) and atr != 0:
+            dmp = 100.0 / atr * plus
+            dmn = 100.0 / atr * minus
+            if dmp + dmn != 0:
+                dx = 100.0 * abs(dmp - dmn) / (dmp + dmn)
+        self.value = self._adx.update(dx)
+        return self.value
+
+
+class StreamingWaveTrend:
+    def __init__(self, chlen: int = 10, avg: int = 21):
+        self.value = math.nan
+        self._esa = StreamingEMA(chlen)
+        self._d = StreamingEMA(chlen)
+        self._wt1 = StreamingEMA(avg)
+
+    def update(self, high: float, low: float, close: float) -> float:
+        ap = (high + low + close) / 3
+        esa = self._esa.update(ap)
+        d = self._d.update(abs(ap - esa))
+        ci = (ap - esa) / (0.015 * d) if d else math.nan
+        self.value = self._wt1.update(ci)
+        return self.value
+
+
+# --- Kernel regression ----------------------------------------------------
+
+@lru_cache(maxsize=32)
+def rational_quadratic_weights(h: float, r: float, window: int) -> np.ndarray:
+    """Weights for lags 0..window (index k is the bar k steps back)."""
+    lags = np.arange(window + 1, dtype=np.float64)
+    weights = (1 + lags ** 2 / (2 * r * h * h)) ** (-r)
+    weights.flags.writeable = False
+    return weights
+
+
+class RationalQuadraticKernel:
+    """Nadaraya-Watson estimate over the last `window` bars with rational-quadratic weights."""
+
+    def __init__(self, h: float, r: float, window: int = 100):
+        self.h = h
+        self.r = r
+        self.window = window
+
+    @property
+    def weights(self) -> np.ndarray:
+        return rational_quadratic_weights(self.h, self.r, self.window)
+
+    def estimate(self, source: np.ndarray, offset: int = 0) -> float:
+        target = len(source) - 1 - offset
+        if target < 0:
+            return 0.0
+        n = min(target, self.window) + 1
+        values = source[target - n + 1: target + 1]
+        return float((values * self.weights[n - 1::-1]).sum() / self.weights[:n].sum())
+
+    def latest(self, source: np.ndarray) -> Tuple[float, float]:
+        return self.estimate(source), self.estimate(source, offset=1)
+
+    def batch(self, source: np.ndarray, chunk_size: int = 4096) -> np.ndarray:
+        # Same per-window arithmetic as estimate(), so batch and streaming runs agree bit for bit.
+        source = np.asarray(source, dtype=np.float64)
+        out = np.empty(len(source))
+        for target in range(min(len(source), self.window)):
+            out[target] = self.estimate(source[:target + 1])
+        if len(source) > self.window:
+            windows = np.lib.stride_tricks.sliding_window_view(source, self.window + 1)
+            reversed_weights = self.weights[::-1]
+            denominator = self.weights.sum()
+            for start in range(0, len(windows), chunk_size):
+                block = windows[start:start + chunk_size]
+                out[self.window + start: self.window + start + len(block)] = \
+                    (block * reversed_weights).sum(axis=1) / denominator
+        return out
@@ -0,0 +1,69 @@
+import numpy as np
+
+
+def lorentzian_distances(train: np.ndarray, query: np.ndarray) -> np.ndarray:
+    # One feature at a time: the temporaries stay 2-D instead of (queries, rows, features),
+    # and the running sum adds features in the same order as np.sum over the last axis.
+    distances = np.log1p(np.abs(train[..., 0] - query[..., 0]))
+    for j in range(1, train.shape[-1]):
+        distances += np.log1p(np.abs(train[..., j] - query[..., j]))
+    return distances
+
+
+def knn_scores(distances: np.ndarray, labels: np.ndarray, k: int) -> np.ndarray:
+    """Sum of the labels of the `k` nearest rows, for every row of the 2-D `distances`.
+
+    Ties at the k-th distance go to the oldest (lowest index) rows, so the score does not
+    depend on how the selection was partitioned. Columns set to inf are never picked as
+    long as a row has at least `k` finite distances.
+    """
+    if k >= distances.shape[-1]:
+        return np.broadcast_to(labels, distances.shape).sum(axis=-1)
+    kth = np.partition(distances, k - 1, axis=-1)[..., k - 1:k]
+    closer = distances < kth
+    tied = distances == kth
+    wanted = k - closer.sum(axis=-1)
+    crowded = tied.sum(axis=-1) > wanted
+    if crowded.any():
+        tied[crowded] &= np.cumsum(tied[crowded], axis=-1) <= wanted[crowded, None]
+    return np.where(closer | tied, labels, 0).sum(axis=-1)
+
+
+class LorentzianFeatureStore:
+    """FIFO of labelled feature rows for the Lorentzian k-NN classifier.
+
+    Rows live in a mirrored ring (see CandleBuffer), so the stored rows are
+    always one contiguous block and a prediction is a single vectorized
+    distance pass plus a partial selection of the `k` nearest.
+    """
+
+    def __init__(self, capacity: int, n_features: int):
+        self.capacity = capacity
+        self._features = np.zeros((2 * capacity, n_features))
+        self._labels = np.zeros(2 * capacity, dtype=np.int64)
+        self._head = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, features: np.ndarray, label: int):
+        i, j = self._head, self._head + self.capacity
+        self._features[i] = self._features[j] = features
+        self._labels[i] = self._labels[j] = label
+        self._head = (self._head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    @property
+    def features(self) -> np.ndarray:
+        end = self._head + self.capacity
+        return self._features[end - self._size:end]
+
+    @property
+    def labels(self) -> np.ndarray:
+        end = self._head + self.capacity
+        return self._labels[end - self._size:end]
+
+    def predict(self, query: np.ndarray, k: int) -> int:
+        return int(knn_scores(lorentzian_distances(self.features, query)[None, :], self.labels, k)[0])
@@ -0,0 +1,104 @@
+from collections import deque
+from typing import Any, Deque, NamedTuple, Tuple
+
+import numpy as np
+
+
+class Pivot(NamedTuple):
+    price: float
+    time: Any
+
+
+class PivotDetector:
+    """Streaming swing high/low detection over a centered window of ``2 * length + 1`` bars.
+
+    A bar is a pivot high once ``length`` later bars have closed and no bar within ``length``
+    on either side has a higher high (ties count); lows mirror this. Window extremes come
+    from monotonic deques, so each bar costs O(1) amortized. Only the newest ``keep`` pivots
+    are retained. With ``dedupe`` a pivot equal in price to the previous one is dropped.
+    """
+
+    def __init__(self, length: int, keep: int = 8, dedupe: bool = False):
+        self.length = length
+        self.span = 2 * length + 1
+        self.keep = keep
+        self.dedupe = dedupe
+        self.reset()
+
+    def reset(self):
+        self.highs: Deque[Pivot] = deque(maxlen=self.keep)
+        self.lows: Deque[Pivot] = deque(maxlen=self.keep)
+        self._bars = 0
+        # (bar index, value), values decreasing (max) / increasing (min) from the front.
+        self._max: Deque[Tuple[int, float]] = deque()
+        self._min: Deque[Tuple[int, float]] = deque()
+        # The newest length + 1 bars; the front one is the pivot candidate.
+        self._pending: Deque[Tuple[float, float, Any]] = deque(maxlen=self.length + 1)
+
+    def update(self, high: float, low: float, time: Any = None) -> Tuple[bool, bool]:
+        """Consumes one closed bar; returns whether a pivot high / low was recorded."""
+        i = self._bars
+        self._bars += 1
+        window_max, window_min = self._max, self._min
+        while window_max and window_max[-1][1] <= high:
+            window_max.pop()
+        window_max.append((i, high))
+        if window_max[0][0] <= i - self.span:
+            window_max.popleft()
+        while window_min and window_min[-1][1] >= low:
+            window_min.pop()
+        window_min.append((i, low))
+        if window_min[0][0] <= i - self.span:
+            window_min.popleft()
+
+        self._pending.append((high, low, time))
+        if self._bars < self.span:
+            return False, False
+
+        candidate_high, candidate_low, candidate_time = self._pending[0]
+        new_high = window_max[0][1] <= candidate_high
+        new_low = window_min[0][1] >= candidate_low
+        if self.dedupe:
+            new_high = new_high and not (self.highs and self.highs[-1].price == candidate_high)
+            new_low = new_low and not (self.lows and self.lows[-1].price == candidate_low)
+        if new_high:
+            self.highs.append(Pivot(candidate_high, candidate_time))
+        if new_low:
+            self.lows.append(Pivot(candidate_low, candidate_time))
+        return new_high, new_low
+
+
+def _drop_repeats(mask: np.ndarray, prices: np.ndarray) -> np.ndarray:
+    confirmed = np.flatnonzero(mask)
+    if len(confirmed) == 0:
+        return mask
+    levels = prices[confirmed]
+    out = np.zeros_like(mask)
+    out[confirmed[np.r_[True, levels[1:] != levels[:-1]]]] = True
+    return out
+
+
+def pivot_flags(highs: np.ndarray, lows: np.ndarray, length: int,
+                dedupe: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """Batch form of ``PivotDetector.update`` over whole series.
+
+    Returns boolean masks that are True at the bar where the detector records a pivot
+    high / low; the pivot bar itself is ``length`` bars earlier.
+    """
+    highs = np.asarray(highs, dtype=np.float64)
+    lows = np.asarray(lows, dtype=np.float64)
+    n, span = len(highs), 2 * length + 1
+    is_high = np.zeros(n, dtype=bool)
+    is_low = np.zeros(n, dtype=bool)
+    if n < span:
+        return is_high, is_low
+
+    window = np.lib.stride_tricks.sliding_window_view
+    is_high[span - 1:] = window(highs, span).max(axis=1) <= highs[length:n - length]
+    is_low[span - 1:] = window(lows, span).min(axis=1) >= lows[length:n - length]
+    if dedupe:
+        candidate_highs = np.r_[np.full(length, np.nan), highs[:n - length]]
+        candidate_lows = np.r_[np.full(length, np.nan), lows[:n - length]]
+        is_high = _drop_repeats(is_high, candidate_highs)
+        is_low = _drop_repeats(is_low, candidate_lows)
+    return is_high, is_low
@@ -0,0 +1,148 @@
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from domain.models import Candle, to_epoch_ns
+
+
+class SystemClock:
+    def time(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+
+class _BarStream:
+    def __init__(self, symbol: str, timeframe_minutes: int):
+        self.symbol = symbol
+        self.timeframe_minutes = timeframe_minutes
+        self.period = timeframe_minutes * 60
+        self.handlers: List[Callable[[Candle], None]] = []
+        self.forming_open: Optional[float] = None
+        self.last_closed = None
+        self.last_poll: Optional[float] = None
+        self.next_poll = 0.0
+        self.backoff = 0.0
+
+
+class BarScheduler:
+    """Polls the terminal only around expected bar closes and dispatches closed candles.
+
+    Candle time and the local clock differ by an unknown server offset. When a bar that
+    opened at B is first seen at clock time F, and the previous poll at P still showed
+    the old bar, then ``B - F <= offset < B - P``. The scheduler keeps the upper end of
+    the latest such bracket and wakes `lead` seconds before the next bar could appear at
+    the earliest, then backs off exponentially until it shows up, which narrows the next
+    bracket. A poll that already sees the new bar only proves the lower end, so the
+    offset is raised to it.
+
+    The first poll after start only shows a bar that opened some time earlier, so streams
+    back off from `min_interval` until a bar change calibrates the offset.
+    """
+
+    def __init__(self, executor, clock=None, lead: float = 0.05,
+                 min_interval: float = 0.05, max_interval: float = 1.0, stats_window: int = 10000):
+        self.executor = executor
+        self.clock = clock or SystemClock()
+        self.lead = lead
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.offset: Optional[float] = None
+        self._streams: Dict[Tuple[str, int], _BarStream] = {}
+
+        self.round_trips = 0
+        self.bars = 0
+        # stats() covers the most recent bars only, so a loop that never ends stays bounded.
+        self.detection_lags: deque = deque(maxlen=stats_window)
+        self.dispatch_times: deque = deque(maxlen=stats_window)
+
+    def subscribe(self, symbol: str, timeframe_minutes: int, handler: Callable[[Candle], None]):
+        key = (symbol, timeframe_minutes)
+        if key not in self._streams:
+            self._streams[key] = _BarStream(symbol, timeframe_minutes)
+        self._streams[key].handlers.append(handler)
+
+    def start(self):
+        for stream in self._streams.values():
+            self._poll(stream, self.clock.time())
+
+    def run(self, until: Optional[Callable[[], bool]] = None):
+        self.start()
+        # Streams that are due together are polled higher timeframe first.
+        streams = sorted(self._streams.values(), key=lambda s: -s.timeframe_minutes)
+        while until is None or not until():
+            delay = min(s.next_poll for s in streams) - self.clock.time()
+            if delay > 0:
+                self.clock.sleep(delay)
+            now = self.clock.time()
+            for stream in streams:
+                if stream.next_poll <= now:
+                    self._poll(stream, self.clock.time())
+
+    def _poll(self, stream: _BarStream, now: float):
+        candles = self.executor.get_candles(stream.symbol, stream.timeframe_minutes, count=2)
+        self.round_trips += 1
+
+        bar_open = to_epoch_ns(candles[-1].timestamp) / 1e9 if candles else None
+        if bar_open is None or (stream.forming_open is not None and bar_open <= stream.forming_open):
+            stream.last_poll = now
+            expected = None if bar_open is None or self.offset is None else self._expected_poll(stream, now)
+            if expected is not None and expected > now:
+                # Still calibrating when another stream has already learned the offset.
+                stream.backoff = 0.0
+                stream.next_poll = expected
+            else:
+                stream.backoff = min(max(stream.backoff * 2, self.min_interval), self.max_interval)
+                stream.next_poll = now + stream.backoff
+            return
+
+        if stream.forming_open is not None:
+            previous = self.offset
+            if stream.backoff > 0.0:
+                self.offset = bar_open - stream.last_poll
+            elif self.offset is None or bar_open - now > self.offset:
+                self.offset = bar_open - now
+            if previous is not None and self.offset > previous:
+                # A larger offset moves every stream's expected close earlier.
+                for other in self._streams.values():
+                    if other is not stream and other.forming_open is not None and other.backoff == 0.0:
+                        other.next_poll = min(other.next_poll, self._expected_poll(other, now))
+        if stream.forming_open is not None:
+            # The bar appeared after the previous poll, so this bounds the detection lag.
+            self.detection_lags.append(now - stream.last_poll)
+            started = time.perf_counter()
+            for candle in candles[:-1]:
+                if stream.last_closed is not None and candle.timestamp <= stream.last_closed: continue
+                for handler in stream.handlers:
+                    handler(candle)
+                self.bars += 1
+            self.dispatch_times.append(time.perf_counter() - started)
+
+        if len(candles) >= 2:
+            stream.last_closed = candles[-2].timestamp
+        stream.forming_open = bar_open
+        stream.last_poll = now
+        if self.offset is None:
+            stream.backoff = self.min_interval
+            stream.next_poll = now + stream.backoff
+        else:
+            stream.backoff = 0.0
+            stream.next_poll = self._expected_poll(stream, now)
+
+    def _expected_poll(self, stream: _BarStream, now: float) -> float:
+        return max(now, stream.forming_open + stream.period - self.offset - self.lead)
+
+    def stats(self) -> dict:
+        lags = np.array(self.detection_lags) * 1000
+        dispatch = np.array(self.dispatch_times) * 1000
+        return {
+            'bars': self.bars,
+            'round_trips': self.round_trips,
+            'round_trips_per_bar': self.round_trips / self.bars if self.bars else None,
+            'server_offset_s': self.offset,
+            'detection_lag_ms_mean': float(lags.mean()) if len(lags) else None,
+            'detection_lag_ms_p95': float(np.percentile(lags, 95)) if len(lags) else None,
+            'dispatch_ms_mean': float(dispatch.mean()) if len(dispatch) else None,
+            'dispatch_ms_p95': float(np.percentile(dispatch, 95)) if len(dispatch) else None,
+        }
@@ -0,0 +1,149 @@
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+from trader.domain.models import Candle, CandleBatch, to_epoch_ns, from_epoch_ns
+
+
+def candles_from_columns(symbol: str, columns: Dict[str, np.ndarray]) -> List[Candle]:
+    """Builds ``Candle`` objects from columns in the ``CandleStore.COLUMNS`` schema."""
+    if len(columns.get('timestamp', ())) == 0:
+        return []
+    return list(CandleBatch.from_columns(symbol, columns))
+
+
+class CandleStore:
+    """Append-only, per-symbol/per-timeframe columnar candle files.
+
+    Layout: ``<root>/<SYMBOL>/M<tf>/<column>.bin``, one raw little-endian array
+    per column. Reads are memory-mapped, so slicing a time range never copies.
+    Timestamps are naive wall-clock int64 nanoseconds (see ``to_epoch_ns``).
+    Ticks live under ``<root>/<SYMBOL>/T/`` as zero-length bars (OHLC = bid), are
+    addressed with ``timeframe_minutes=TICKS`` and are filled by ``sync_ticks``.
+    """
+    TICKS = 0
+    COLUMNS = {
+        'timestamp': np.dtype('<i8'),
+        'open': np.dtype('<f8'),
+        'high': np.dtype('<f8'),
+        'low': np.dtype('<f8'),
+        'close': np.dtype('<f8'),
+        'volume': np.dtype('<f8'),
+    }
+
+    def __init__(self, root: str):
+        self.root = str(root)
+
+    def _dir(self, symbol: str, timeframe_minutes: int) -> str:
+        return os.path.join(self.root, symbol, "T" if timeframe_minutes == self.TICKS else f"M{timeframe_minutes}")
+
+    def _path(self, symbol: str, timeframe_minutes: int, column: str) -> str:
+        return os.path.join(self._dir(symbol, timeframe_minutes), f"{column}.bin")
+
+    def streams(self):
+        if not os.path.isdir(self.root): return
+        for symbol in sorted(os.listdir(self.root)):
+            for tf_dir in sorted(os.listdir(os.path.join(self.root, symbol))):
+                if tf_dir.startswith('M') and tf_dir[1:].isdigit():
+                    yield symbol, int(tf_dir[1:])
+
+    def count(self, symbol: str, timeframe_minutes: int) -> int:
+        # A torn append leaves columns of different lengths; only complete rows count.
+        sizes = []
+        for column, dtype in self.COLUMNS.items():
+            path = self._path(symbol, timeframe_minutes, column)
+            sizes.append(os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0)
+        return min(sizes)
+
+    def _column(self, symbol: str, timeframe_minutes: int, column: str, rows: int) -> np.ndarray:
+        dtype = self.COLUMNS[column]
+        if rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._path(symbol, timeframe_minutes, column), dtype=dtype, mode='r', shape=(rows,))
+
+    def last_timestamp(self, symbol: str, timeframe_minutes: int) -> Optional[int]:
+        rows = self.count(symbol, timeframe_minutes)
+        if rows == 0: return None
+        return int(self._column(symbol, timeframe_minutes, 'timestamp', rows)[-1])
+
+    def append(self, symbol: str, timeframe_minutes: int, columns: Dict[str, np.ndarray]) -> int:
+        timestamps = np.asarray(columns['timestamp'], dtype=np.int64)
+        last = self.last_timestamp(symbol, timeframe_minutes)
+        keep = slice(None) if last is None else slice(np.searchsorted(timestamps, last, side='right'), None)
+        if len(timestamps[keep]) == 0:
+            return 0
+
+        os.makedirs(self._dir(symbol, timeframe_minutes), exist_ok=True)
+        rows = self.count(symbol, timeframe_minutes)
+        for column, dtype in self.COLUMNS.items():
+            path = self._path(symbol, timeframe_minutes, column)
+            data = np.ascontiguousarray(np.asarray(columns[column])[keep], dtype=dtype)
+            with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+                f.truncate(rows * dtype.itemsize)
+                f.seek(rows * dtype.itemsize)
+                f.write(data.tobytes())
+        return len(timestamps[keep])
+
+    def append_candles(self, symbol: str, timeframe_minutes: int, candles: List) -> int:
+        columns = {name: [getattr(c, name) for c in candles] for name in self.COLUMNS if name != 'timestamp'}
+        columns['timestamp'] = [to_epoch_ns(c.timestamp) for c in candles]
+        return self.append(symbol, timeframe_minutes, columns)
+
+    def append_ticks(self, symbol: str, timestamps: np.ndarray, bids: np.ndarray,
+                     volumes: Optional[np.ndarray] = None) -> int:
+        bids = np.asarray(bids, dtype=np.float64)
+        return self.append(symbol, self.TICKS, {
+            'timestamp': timestamps, 'open': bids, 'high': bids, 'low': bids, 'close': bids,
+            'volume': np.zeros(len(bids)) if volumes is None else volumes,
+        })
+
+    def read(self, symbol: str, timeframe_minutes: int, start: Optional[datetime] = None,
+             end: Optional[datetime] = None, count: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Zero-copy column views for ``start <= timestamp < end``, limited to the last ``count`` rows."""
+        rows = self.count(symbol, timeframe_minutes)
+        timestamps = self._column(symbol, timeframe_minutes, 'timestamp', rows)
+        lo = 0 if start is None else int(np.searchsorted(timestamps, to_epoch_ns(start), side='left'))
+        hi = rows if end is None else int(np.searchsorted(timestamps, to_epoch_ns(end), side='left'))
+        if count is not None:
+            lo = max(lo, hi - count)
+        return {column: self._column(symbol, timeframe_minutes, column, rows)[lo:hi] for column in self.COLUMNS}
+
+    def read_candles(self, symbol: str, timeframe_minutes: int, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None, count: Optional[int] = None) -> CandleBatch:
+        """Like ``read``, as a candle sequence over the same memory-mapped columns."""
+        return CandleBatch.from_columns(symbol, self.read(symbol, timeframe_minutes, start, end, count))
+
+    def sync(self, executor, symbol: str, timeframe_minutes: int, count: int) -> int:
+        """Fetches only the bars newer than what is stored (at most ``count``) and appends them.
+
+        The newest bar from the terminal is still forming and is never persisted.
+        """
+        last = self.last_timestamp(symbol, timeframe_minutes)
+        if last is not None:
+            latest = executor.get_rates(symbol, timeframe_minutes, count=1)
+            if not latest: return 0
+            missing = (int(latest['timestamp'][0]) - last) // (timeframe_minutes * 60 * 10 ** 9) + 1
+            count = int(min(count, max(missing, 1)))
+
+        rates = executor.get_rates(symbol, timeframe_minutes, count=count + 1)
+        if not rates: return 0
+        return self.append(symbol, timeframe_minutes, {name: column[:-1] for name, column in rates.items()})
+
+    def sync_ticks(self, executor, symbol: str, start: datetime, end: datetime,
+                   chunk: timedelta = timedelta(hours=6)) -> int:
+        """Fetches the ticks in ``[start, end)`` newer than the stored ones, one ``chunk`` at a time, and appends them.
+
+        ``executor.get_ticks`` supplies ``timestamp``/``bid``/``volume`` columns. Ticks sharing the
+        newest stored timestamp are not fetched again.
+        """
+        last = self.last_timestamp(symbol, self.TICKS)
+        if last is not None:
+            start = max(start, from_epoch_ns(last))
+        added = 0
+        while start < end:
+            stop = min(start + chunk, end)
+            ticks = executor.get_ticks(symbol, start, stop)
+            if ticks:
+                added += self.append_ticks(symbol, ticks['timestamp'], ticks['bid'], ticks['volume'])
+            start = stop
+        return added
@@ -1,12 +1,28 @@
+from collections.abc import Sequence
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
+import numpy as np
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch_ns(ts: datetime) -> int:
+    # Naive wall-clock time, as MT5 candles carry it, encoded as int64 nanoseconds.
+    if ts.tzinfo is not None:
+        ts = ts.replace(tzinfo=None)
+    delta = ts - _EPOCH
+    return ((delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds) * 1000
+
+
+def from_epoch_ns(ns: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=int(ns) // 1000)
 
 class SignalType(Enum):
     BUY = "BUY"
     SELL = "SELL"
 
-@dataclass
+@dataclass(slots=True)
 class Candle:
     symbol: str
     timestamp: datetime
@@ -16,7 +32,68 @@ class Candle:
     close: float
     volume: float
 
-@dataclass
+
+class CandleBatch(Sequence):
+    """Read-only sequence of one symbol's candles backed by shared column arrays.
+
+    Columns follow the CandleStore schema (``timestamp`` as naive wall-clock int64 ns).
+    Slicing returns another batch over views of the same arrays; ``Candle`` objects are
+    only built for the rows that are indexed or iterated.
+    """
+    __slots__ = ('symbol', 'timestamp', 'open', 'high', 'low', 'close', 'volume')
+    COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+    _CHUNK = 4096
+
+    def __init__(self, symbol: str, timestamp, open, high, low, close, volume):
+        self.symbol = symbol
+        self.timestamp = np.asarray(timestamp, dtype=np.int64)
+        self.open = np.asarray(open, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.float64)
+
+    @classmethod
+    def from_columns(cls, symbol: str, columns) -> 'CandleBatch':
+        return cls(symbol, *(columns[name] for name in cls.COLUMNS))
+
+    @classmethod
+    def from_candles(cls, candles, symbol: str = None) -> 'CandleBatch':
+        if isinstance(candles, CandleBatch):
+            return candles
+        if symbol is None:
+            symbol = candles[0].symbol if len(candles) else ''
+        return cls(symbol, [to_epoch_ns(c.timestamp) for c in candles],
+                   *([getattr(c, name) for c in candles] for name in cls.COLUMNS[1:]))
+
+    def columns(self):
+        return {name: getattr(self, name) for name in self.COLUMNS}
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return CandleBatch(self.symbol, *(getattr(self, name)[index] for name in self.COLUMNS))
+        return Candle(self.symbol, from_epoch_ns(self.timestamp[index]), float(self.open[index]),
+                      float(self.high[index]), float(self.low[index]), float(self.close[index]),
+                      float(self.volume[index]))
+
+    def __iter__(self):
+        symbol = self.symbol
+        for lo in range(0, len(self), self._CHUNK):
+            hi = lo + self._CHUNK
+            timestamps = self.timestamp[lo:hi].view('datetime64[ns]').astype('datetime64[us]').tolist()
+            for ts, o, h, l, c, v in zip(timestamps, self.open[lo:hi].tolist(), self.high[lo:hi].tolist(),
+                                         self.low[lo:hi].tolist(), self.close[lo:hi].tolist(),
+                                         self.volume[lo:hi].tolist()):
+                yield Candle(symbol, ts, o, h, l, c, v)
+
+    def __repr__(self):
+        return f"CandleBatch({self.symbol!r}, {len(self)} candles)"
+
+
+@dataclass(slots=True, frozen=True)
 class Signal:
     agent_name: str
     symbol: str
@@ -28,7 +105,7 @@ class Signal:
     stop_loss: float
     take_profit: float
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Order:
     agent_name: str
     symbol: str
@@ -41,7 +118,7 @@ class Order:
     comment: str
     ticket_id: int = 0  # Default 0 for new orders
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     ticket: int
     symbol: str
@@ -1,6 +1,57 @@
+import time
 import MetaTrader5 as mt5
-from datetime import datetime, timedelta
-from trader.domain.models import SignalType, Position, Order, Candle
+import numpy as np
+from datetime import datetime
+from trader.data.candle_store import candles_from_columns
+from trader.domain.models import SignalType, Position, to_epoch_ns
+
+_NS = 10 ** 9
+
+
+def _local_offsets(seconds: np.ndarray) -> np.ndarray:
+    """UTC offset in seconds of the local zone at each epoch second, as ``fromtimestamp`` applies it.
+
+    Offsets only change on zone transitions, which fall on quarter hours in practice (30 and
+    45 minute zones included), so they are looked up at both ends of each distinct 15-minute
+    bucket. Rows in a bucket whose ends disagree are looked up one by one.
+    """
+    buckets, inverse = np.unique(seconds // 900, return_inverse=True)
+    starts = np.array([time.localtime(int(b) * 900).tm_gmtoff for b in buckets], dtype=np.int64)
+    ends = np.array([time.localtime(int(b) * 900 + 899).tm_gmtoff for b in buckets], dtype=np.int64)
+    offsets = starts[inverse]
+    split = (starts != ends)[inverse]
+    offsets[split] = [time.localtime(int(s)).tm_gmtoff for s in seconds[split]]
+    return offsets
+
+
+def rates_to_columns(rates: np.ndarray, offset_hours: float = 0) -> dict:
+    """Converts a ``copy_rates_*`` structured array into ``CandleStore.COLUMNS`` arrays.
+
+    Timestamps are the same naive wall-clock times the per-row ``datetime.fromtimestamp``
+    conversion produced, shifted by ``offset_hours``, as int64 nanoseconds.
+    """
+    seconds = rates['time'].astype(np.int64)
+    return {
+        'timestamp': (seconds + _local_offsets(seconds)) * _NS + int(offset_hours * 3600 * _NS),
+        'open': rates['open'].astype(np.float64),
+        'high': rates['high'].astype(np.float64),
+        'low': rates['low'].astype(np.float64),
+        'close': rates['close'].astype(np.float64),
+        'volume': rates['tick_volume'].astype(np.float64),
+    }
+
+
+def ticks_to_columns(ticks: np.ndarray, offset_hours: float = 0) -> dict:
+    """Converts a ``copy_ticks_*`` structured array into ``timestamp``/``bid``/``volume`` arrays.
+
+    Timestamps keep the ticks' millisecond precision, on the same wall clock as ``rates_to_columns``.
+    """
+    millis = ticks['time_msc'].astype(np.int64)
+    return {
+        'timestamp': millis * 1_000_000 + _local_offsets(millis // 1000) * _NS + int(offset_hours * 3600 * _NS),
+        'bid': ticks['bid'].astype(np.float64),
+        'volume': ticks['volume'].astype(np.float64),
+    }
 
 
 class MT5Executor:
@@ -28,33 +79,35 @@ class MT5Executor:
             self.is_connected = False
             print("✅ MT5 Connection Closed")
 
-    def get_candles(self, symbol: str, timeframe_minutes: int, count: int = 1):
-        if not self.is_connected: return []
+    def get_rates(self, symbol: str, timeframe_minutes: int, count: int = 1) -> dict:
+        """The last ``count`` bars as columns (``CandleStore.COLUMNS``); empty dict if none."""
+        if not self.is_connected: return {}
         tf_constant = self.timeframe_map.get(timeframe_minutes, mt5.TIMEFRAME_M5)
         rates = mt5.copy_rates_from_pos(symbol, tf_constant, 0, count)
-        if rates is None or len(rates) == 0: return []
-
-        candle_list = []
-        for rate in rates:
-            dt_raw = datetime.fromtimestamp(rate['time'])
-            dt_corrected = dt_raw + timedelta(hours=self.manual_offset_hours)
-            c = Candle(
-                symbol=symbol, timestamp=dt_corrected,
-                open=rate['open'], high=rate['high'], low=rate['low'],
-                close=rate['close'], volume=rate['tick_volume']
-            )
-            candle_list.append(c)
-        return candle_list
+        if rates is None or len(rates) == 0: return {}
+        return rates_to_columns(rates, self.manual_offset_hours)
+
+    def get_ticks(self, symbol: str, start: datetime, end: datetime) -> dict:
+        """Bid changes with ``start <= time < end`` as ``ticks_to_columns`` arrays; empty dict if none.
+
+        ``start``/``end`` are naive wall-clock times, like candle timestamps.
+        """
+        if not self.is_connected: return {}
+        shift = self.manual_offset_hours * 3600
+        ticks = mt5.copy_ticks_range(symbol, int(start.timestamp() - shift), int(end.timestamp() - shift),
+                                     mt5.COPY_TICKS_INFO)
+        if ticks is None or len(ticks) == 0: return {}
+        columns = ticks_to_columns(ticks, self.manual_offset_hours)
+        # The range is requested in whole seconds; trim it to the exact window.
+        keep = (columns['timestamp'] >= to_epoch_ns(start)) & (columns['timestamp'] < to_epoch_ns(end))
+        return {name: column[keep] for name, column in columns.items()}
+
+    def get_candles(self, symbol: str, timeframe_minutes: int, count: int = 1):
+        return candles_from_columns(symbol, self.get_rates(symbol, timeframe_minutes, count))
 
     def get_historical_data_as_dict(self, symbol: str, timeframe_minutes: int, count: int = 2000):
-        candles = self.get_candles(symbol, timeframe_minutes, count)
-        data = []
-        for c in candles:
-            data.append({
-                'open': c.open, 'high': c.high, 'low': c.low,
-                'close': c.close, 'volume': c.volume, 'timestamp': c.timestamp
-            })
-        return data
+        return [{'open': c.open, 'high': c.high, 'low': c.low, 'close': c.close, 'volume': c.volume,
+                 'timestamp': c.timestamp} for c in self.get_candles(symbol, timeframe_minutes, count)]
 
     def execute_order(self, order_or_signal):
         if not self.is_connected: return
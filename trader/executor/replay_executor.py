@@ -0,0 +1,247 @@
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from trader.data.candle_store import CandleStore, candles_from_columns
+from trader.domain.models import SignalType, Position, to_epoch_ns, from_epoch_ns
+
+_NS = 10 ** 9
+
+
+class ReplayExecutor:
+    """Offline stand-in for MT5Executor that replays recorded candles from a CandleStore.
+
+    The replay keeps its own clock in candle time. With `speed=None` it runs as fast as
+    possible: the clock only moves when the caller sleeps, so a run is fully deterministic.
+    Otherwise the clock follows the wall clock scaled by `speed`.
+
+    Like the terminal, `get_candles` returns the still-forming bar last. That bar only
+    exposes its open price, so the loop under test never sees the future. Orders fill at
+    the current price plus `spread` on the ask side, and SL/TP are checked against every
+    bar of the finest recorded timeframe that closes.
+    """
+
+    def __init__(self, store: CandleStore, speed: Optional[float] = None, start: Optional[datetime] = None,
+                 warmup_bars: int = 2000, spread: float = 0.15, contract_size: float = 100):
+        self.store = store
+        self.speed = speed
+        self.start = start
+        self.warmup_bars = warmup_bars
+        self.spread = spread
+        self.contract_size = contract_size
+        self.is_connected = False
+        self.manual_offset_hours = 0
+
+        self._streams: Dict[Tuple[str, int], Dict[str, np.ndarray]] = {}
+        self._now = 0
+        self._start_ns = 0
+        self._wall_start = 0.0
+        self._end = 0
+        self._positions: Dict[int, dict] = {}
+        self._settled: Dict[str, int] = {}
+        self._ticket_counter = 1
+        self._served: Dict[Tuple[str, int], int] = {}
+        self._last_bar_wall = None
+
+        self.closed_positions: List[dict] = []
+        self.fills: List[dict] = []
+        self.round_trips = 0
+        self.bars_served = 0
+
+    # --- clock --------------------------------------------------------------
+
+    def connect(self):
+        streams = list(self.store.streams())
+        if not streams:
+            print(f"❌ Replay Init Failed: no recorded candles under {self.store.root}")
+            return False
+        for symbol, tf in streams:
+            self._streams[(symbol, tf)] = self.store.read(symbol, tf)
+
+        base = self._stream(*self._base(streams[0][0]))
+        if self.start is not None:
+            self._now = to_epoch_ns(self.start)
+        else:
+            self._now = int(base['timestamp'][min(self.warmup_bars, len(base['timestamp']) - 1)])
+        self._end = max(int(s['timestamp'][-1]) for s in self._streams.values() if len(s['timestamp']))
+        self._wall_start = time.perf_counter()
+        self._start_ns = self._now
+        self.is_connected = True
+        print(f"✅ Connected to Replay ({len(streams)} streams, starting {from_epoch_ns(self._now)})")
+        return True
+
+    def shutdown(self):
+        if self.is_connected:
+            self.is_connected = False
+            print("✅ Replay Closed")
+
+    def _clock_ns(self) -> int:
+        if self.speed is not None:
+            elapsed = (time.perf_counter() - self._wall_start) * self.speed
+            self._now = self._start_ns + int(elapsed * _NS)
+        return self._now
+
+    def time(self) -> float:
+        return self._clock_ns() / _NS
+
+    def now(self) -> datetime:
+        return from_epoch_ns(self._clock_ns())
+
+    def sleep(self, seconds: float):
+        if self.speed is None:
+            self._now += int(seconds * _NS)
+        else:
+            time.sleep(seconds / self.speed)
+
+    @property
+    def finished(self) -> bool:
+        return self._clock_ns() > self._end
+
+    # --- market data --------------------------------------------------------
+
+    def _stream(self, symbol: str, timeframe_minutes: int) -> Dict[str, np.ndarray]:
+        return self._streams.get((symbol, timeframe_minutes), {})
+
+    def _base(self, symbol: str) -> Tuple[str, int]:
+        return symbol, min(tf for s, tf in self._streams if s == symbol)
+
+    def _forming_index(self, timestamps: np.ndarray, now: int) -> int:
+        return int(np.searchsorted(timestamps, now, side='right')) - 1
+
+    def _current_price(self, symbol: str) -> Optional[float]:
+        stream = self._stream(*self._base(symbol))
+        i = self._forming_index(stream['timestamp'], self._clock_ns())
+        return float(stream['open'][i]) if i >= 0 else None
+
+    def get_rates(self, symbol: str, timeframe_minutes: int, count: int = 1) -> Dict[str, np.ndarray]:
+        if not self.is_connected: return {}
+        self.round_trips += 1
+        stream = self._stream(symbol, timeframe_minutes)
+        if not stream: return {}
+        self._settle(symbol)
+
+        now = self._clock_ns()
+        i = self._forming_index(stream['timestamp'], now)
+        if i < 0: return {}
+
+        key = (symbol, timeframe_minutes)
+        if self._served.get(key, i) < i:
+            self.bars_served += i - self._served[key]
+            self._last_bar_wall = time.perf_counter()
+        self._served[key] = i
+
+        lo = max(0, i - count + 1)
+        columns = {name: np.array(column[lo:i + 1]) for name, column in stream.items()}
+        forming_open = columns['open'][-1]
+        columns['high'][-1] = columns['low'][-1] = columns['close'][-1] = forming_open
+        columns['volume'][-1] = 0.0
+        return columns
+
+    def get_candles(self, symbol: str, timeframe_minutes: int, count: int = 1):
+        return candles_from_columns(symbol, self.get_rates(symbol, timeframe_minutes, count))
+
+    def get_historical_data_as_dict(self, symbol: str, timeframe_minutes: int, count: int = 2000):
+        return [{'open': c.open, 'high': c.high, 'low': c.low, 'close': c.close, 'volume': c.volume,
+                 'timestamp': c.timestamp} for c in self.get_candles(symbol, timeframe_minutes, count)]
+
+    # --- simulated trading --------------------------------------------------
+
+    def _settle(self, symbol: str):
+        stream = self._stream(*self._base(symbol))
+        closed_upto = self._forming_index(stream['timestamp'], self._clock_ns())
+        start = self._settled.get(symbol, closed_upto)
+        self._settled[symbol] = closed_upto
+        for i in range(start, closed_upto):
+            ts = from_epoch_ns(stream['timestamp'][i])
+            high, low = float(stream['high'][i]), float(stream['low'][i])
+            for ticket, pos in list(self._positions.items()):
+                if pos['symbol'] != symbol: continue
+                if pos['type'] == SignalType.BUY:
+                    if pos['sl'] > 0 and low <= pos['sl']:
+                        self._close(ticket, pos['sl'], ts, "SL")
+                    elif pos['tp'] > 0 and high >= pos['tp']:
+                        self._close(ticket, pos['tp'], ts, "TP")
+                else:
+                    if pos['sl'] > 0 and high + self.spread >= pos['sl']:
+                        self._close(ticket, pos['sl'], ts, "SL")
+                    elif pos['tp'] > 0 and low + self.spread <= pos['tp']:
+                        self._close(ticket, pos['tp'], ts, "TP")
+
+    def _close(self, ticket: int, exit_price: float, timestamp: datetime, reason: str):
+        pos = self._positions.pop(ticket)
+        sign = 1 if pos['type'] == SignalType.BUY else -1
+        profit = sign * (exit_price - pos['open_price']) * pos['volume'] * self.contract_size
+        self.closed_positions.append({**pos, 'exit_price': exit_price, 'close_time': timestamp,
+                                      'profit': profit, 'exit_reason': reason})
+
+    def execute_order(self, order_or_signal):
+        if not self.is_connected: return
+        received_wall = time.perf_counter()
+
+        direction = getattr(order_or_signal, 'order_type', getattr(order_or_signal, 'signal_type', None))
+        if direction is None: return
+
+        comment_text = getattr(order_or_signal, 'comment', getattr(order_or_signal, 'reason', "AutoTrade"))
+        symbol = order_or_signal.symbol
+        magic = int(order_or_signal.magic_number)
+        self._settle(symbol)
+        price = self._current_price(symbol)
+        if price is None: return
+        now = self.now()
+
+        for ticket, pos in list(self._positions.items()):
+            if pos['symbol'] == symbol and pos['magic'] == magic and pos['type'] != direction:
+                print(f"🔄 Flipping Position {ticket}...")
+                self._close(ticket, price if pos['type'] == SignalType.BUY else price + self.spread, now,
+                            "Auto Close/Flip")
+
+        fill_price = price + self.spread if direction == SignalType.BUY else price
+        ticket = self._ticket_counter
+        self._ticket_counter += 1
+        self._positions[ticket] = {
+            'ticket': ticket, 'symbol': symbol, 'magic': magic, 'type': direction,
+            'volume': float(order_or_signal.volume), 'open_price': fill_price,
+            'sl': float(order_or_signal.stop_loss), 'tp': float(order_or_signal.take_profit),
+            'time': now, 'comment': str(comment_text)[:31]
+        }
+        self.fills.append({
+            'ticket': ticket, 'symbol': symbol, 'time': now, 'price': fill_price,
+            'latency_ms': (received_wall - self._last_bar_wall) * 1000 if self._last_bar_wall else None
+        })
+        print(f"🚀 ORDER EXECUTED! Ticket: {ticket}")
+
+    def get_open_positions(self, symbol: str = None):
+        if not self.is_connected: return []
+        self.round_trips += 1
+        clean = []
+        # Settling closes positions, so collect the symbols before touching the book.
+        for sym in {p['symbol'] for p in list(self._positions.values()) if not symbol or p['symbol'] == symbol}:
+            self._settle(sym)
+        for pos in self._positions.values():
+            if symbol and pos['symbol'] != symbol: continue
+            price = self._current_price(pos['symbol'])
+            is_buy = pos['type'] == SignalType.BUY
+            current = price if is_buy else price + self.spread
+            profit = (current - pos['open_price']) * (1 if is_buy else -1) * pos['volume'] * self.contract_size
+            clean.append(Position(
+                ticket=pos['ticket'], symbol=pos['symbol'], type="BUY" if is_buy else "SELL",
+                volume=pos['volume'], open_price=pos['open_price'], current_price=current,
+                sl=pos['sl'], tp=pos['tp'], profit=profit, time=pos['time']
+            ))
+        return clean
+
+    def stats(self) -> dict:
+        """Throughput and signal-to-order latency of the loop driven by this replay."""
+        wall = time.perf_counter() - self._wall_start
+        latencies = np.array([f['latency_ms'] for f in self.fills if f['latency_ms'] is not None])
+        return {
+            'simulated_seconds': (self._clock_ns() - self._start_ns) / _NS,
+            'wall_seconds': wall,
+            'bars_served': self.bars_served,
+            'bars_per_second': self.bars_served / wall if wall > 0 else 0.0,
+            'round_trips': self.round_trips,
+            'orders': len(self.fills),
+            'latency_ms_mean': float(latencies.mean()) if len(latencies) else None,
+            'latency_ms_p95': float(np.percentile(latencies, 95)) if len(latencies) else None,
+            'latency_ms_max': float(latencies.max()) if len(latencies) else None,
+        }
@@ -1,30 +1,51 @@
-import json
-import zlib
-from typing import List, Dict, Any
-from trader.domain.models import SignalType
-from journal.models import ChartData, BacktestSession
+from typing import Any, Dict, Iterable, List, Optional
+from django.db import transaction
+from trader.domain.models import SignalType, to_epoch_ns
+from journal.models import ChartBlob, ChartTile
+from journal.backtest.chart_pyramid import build_pyramid, digest, tiles
 
 
-def export_tv_data(session_id: int, candles: List[Any], trades: List[Dict[str, Any]]) -> None:
-    chart_data = []
-    volume_data = []
-    markers_data = []
+def export_tv_data(session_id: int, candles: List[Any]) -> None:
+    """Stores the session's candles as a multi-resolution pyramid of tiles.
 
-    for c in candles:
-        ts = int(c.timestamp.timestamp())
-        chart_data.append({
-            'time': ts,
-            'open': float(c.open),
-            'high': float(c.high),
-            'low': float(c.low),
-            'close': float(c.close)
-        })
-        color = '#26a69a' if c.close >= c.open else '#ef5350'
-        volume_data.append({
-            'time': ts,
-            'value': int(c.volume),
-            'color': color
-        })
+    Tile payloads are content-addressed: a block already stored for another session is
+    referenced, not written again. On a re-export, payloads only the old tiles used are
+    dropped; `manage.py prune_chart_blobs` cleans up after deleted sessions.
+    """
+    rows, blobs = [], {}
+    for level, columns in build_pyramid(candles).items():
+        for start, end, bars, payload in tiles(columns, level):
+            key = digest(payload)
+            blobs[key] = (bars, payload)
+            rows.append(ChartTile(session_id=session_id, resolution=level, start_time=start, end_time=end,
+                                  blob_id=key))
+
+    with transaction.atomic():
+        stored = set(ChartBlob.objects.filter(digest__in=list(blobs)).values_list('digest', flat=True))
+        ChartBlob.objects.bulk_create([ChartBlob(digest=key, bars=bars, payload=payload)
+                                       for key, (bars, payload) in blobs.items() if key not in stored])
+        old_tiles = ChartTile.objects.filter(session_id=session_id)
+        replaced = set(old_tiles.values_list('blob_id', flat=True)) - set(blobs)
+        old_tiles.delete()
+        ChartTile.objects.bulk_create(rows)
+        prune_chart_blobs(replaced)
+
+
+def prune_chart_blobs(digests: Optional[Iterable[str]] = None) -> int:
+    """Deletes payloads no session references any more, among ``digests`` or all of them."""
+    orphans = ChartBlob.objects.filter(tiles__isnull=True)
+    if digests is not None:
+        digests = list(digests)
+        if not digests:
+            return 0
+        orphans = orphans.filter(digest__in=digests)
+    deleted, _ = orphans.delete()
+    return deleted
+
+
+def trade_markers(trades: List[Any], start: int = None, end: int = None) -> List[Dict[str, Any]]:
+    """Entry/exit markers of ``trades`` (dicts or Trade rows) with times in ``[start, end]``."""
+    markers_data = []
 
     for t in trades:
         is_dict = isinstance(t, dict)
@@ -34,8 +55,8 @@ def export_tv_data(session_id: int, candles: List[Any], trades: List[Dict[str, A
         t_profit = float(t['net_profit'] if is_dict else t.net_profit)
         t_ticket = int(t['ticket'] if is_dict else t.ticket)
 
-        open_ts = int(t_open.timestamp())
-        close_ts = int(t_close.timestamp())
+        open_ts = to_epoch_ns(t_open) // 10 ** 9
+        close_ts = to_epoch_ns(t_close) // 10 ** 9
         is_buy = (t_type == SignalType.BUY)
 
         markers_data.append({
@@ -56,22 +77,12 @@ def export_tv_data(session_id: int, candles: List[Any], trades: List[Dict[str, A
 
     markers_data.sort(key=lambda x: x['time'])
 
+    # Markers sharing a second would collapse on the chart; nudge them apart.
     used_times = set()
     for m in markers_data:
         while m['time'] in used_times:
             m['time'] += 1
         used_times.add(m['time'])
 
-    payload = {
-        "chart_data": chart_data,
-        "volume_data": volume_data,
-        "markers_data": markers_data
-    }
-
-    compressed_data = zlib.compress(json.dumps(payload).encode('utf-8'), level=3)
-
-    session = BacktestSession.objects.get(id=session_id)
-    ChartData.objects.update_or_create(
-        session=session,
-        defaults={'payload': compressed_data}
-    )
\ No newline at end of file
+    return [m for m in markers_data
+            if (start is None or m['time'] >= start) and (end is None or m['time'] <= end)]
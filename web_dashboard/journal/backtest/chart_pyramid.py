@@ -0,0 +1,89 @@
+import gzip
+import hashlib
+from typing import Any, Dict, List
+import numpy as np
+from trader.domain.models import CandleBatch
+
+# Chart resolutions in minutes; a session stores every level at or above its own bar size.
+LEVELS = (1, 5, 15, 60, 240, 1440)
+TILE_BARS = 2048
+# Most bars the session chart keeps loaded for one view.
+MAX_BARS = 3000
+
+COLUMNS = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+
+def candle_columns(candles: List[Any]) -> Dict[str, np.ndarray]:
+    """Chart columns with ``time`` in epoch seconds of the naive wall-clock timestamp."""
+    batch = CandleBatch.from_candles(candles)
+    columns = {name: getattr(batch, name) for name in COLUMNS[1:]}
+    columns['time'] = batch.timestamp // 10 ** 9
+    return columns
+
+
+def aggregate(columns: Dict[str, np.ndarray], minutes: int) -> Dict[str, np.ndarray]:
+    """OHLCV bars merged into ``minutes``-wide buckets aligned to the epoch."""
+    interval = minutes * 60
+    buckets = columns['time'] // interval * interval
+    if len(buckets) == 0:
+        return {name: column[:0] for name, column in columns.items()}
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)] - 1
+    return {
+        'time': buckets[starts],
+        'open': columns['open'][starts],
+        'high': np.maximum.reduceat(columns['high'], starts),
+        'low': np.minimum.reduceat(columns['low'], starts),
+        'close': columns['close'][ends],
+        'volume': np.add.reduceat(columns['volume'], starts),
+    }
+
+
+def base_resolution(times: np.ndarray) -> int:
+    """Bar size of the series in minutes, from its most common spacing."""
+    if len(times) < 2:
+        return LEVELS[0]
+    spacing, counts = np.unique(np.diff(times), return_counts=True)
+    return max(1, int(spacing[np.argmax(counts)]) // 60)
+
+
+def build_pyramid(candles: List[Any]) -> Dict[int, Dict[str, np.ndarray]]:
+    columns = candle_columns(candles)
+    base = base_resolution(columns['time'])
+    return {level: aggregate(columns, level) if level > base else columns
+            for level in LEVELS if level >= base and (level == base or level % base == 0)}
+
+
+def encode_tile(columns: Dict[str, np.ndarray]) -> bytes:
+    """Tile wire format: the COLUMNS as consecutive little-endian float64 arrays, gzipped.
+
+    Browsers inflate it natively (``Content-Encoding: gzip``) and read the body straight
+    into a ``Float64Array``; epoch seconds are exact in float64.
+    """
+    raw = b''.join(np.ascontiguousarray(columns[name], dtype='<f8').tobytes() for name in COLUMNS)
+    return gzip.compress(raw, compresslevel=6, mtime=0)
+
+
+def decode_tile(payload: bytes, bars: int) -> Dict[str, np.ndarray]:
+    raw = np.frombuffer(gzip.decompress(bytes(payload)), dtype='<f8').reshape(len(COLUMNS), bars)
+    columns = dict(zip(COLUMNS, raw))
+    columns['time'] = columns['time'].astype(np.int64)
+    return columns
+
+
+def digest(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()
+
+
+def tiles(columns: Dict[str, np.ndarray], resolution: int, tile_bars: int = TILE_BARS):
+    """Yields ``(start_time, end_time, bars, payload)`` per block of ``tile_bars`` bar slots.
+
+    Blocks are aligned to fixed epoch boundaries rather than to the first candle, so every
+    session covering the same stretch of market data produces byte-identical interior tiles.
+    """
+    keys = columns['time'] // (tile_bars * resolution * 60)
+    bounds = np.r_[0, np.flatnonzero(keys[1:] != keys[:-1]) + 1, len(keys)]
+    for lo, hi in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        if lo == hi: continue
+        block = {name: column[lo:hi] for name, column in columns.items()}
+        yield int(block['time'][0]), int(block['time'][-1]), hi - lo, encode_tile(block)
@@ -1,4 +1,5 @@
 from trader.domain.models import SignalType
+from journal.backtest.sinks import EquitySeries
 
 
 class UnifiedEngine:
@@ -48,27 +49,35 @@ class UnifiedEngine:
             timestamp=timestamp
         )
 
-    def run(self, ltf_data, htf_data=None, step_method='on_market_data'):
-        equity_curve = []
-        htf_idx = 0
+    def run(self, ltf_data, htf_data=None, step_method='on_market_data', signals=None, equity_curve=None):
+        # Any sink with append(timestamp, balance, equity, dd); an in-memory EquitySeries by default.
+        if equity_curve is None:
+            equity_curve = EquitySeries(capacity=max(1, len(ltf_data)))
+        htf_candles = iter(htf_data) if htf_data is not None else iter(())
+        next_htf = next(htf_candles, None)
 
-        is_mtf = hasattr(self.agent, 'on_htf_candle') and htf_data is not None
+        # Precomputed signals (one entry per ltf candle) replace stepping the agent entirely.
+        is_mtf = hasattr(self.agent, 'on_htf_candle') and htf_data is not None and signals is None
 
-        if not hasattr(self.agent, step_method):
-            raise AttributeError(f"Agent '{self.agent.name}' is missing the method: {step_method}()")
-
-        process_method = getattr(self.agent, step_method)
-        print(f"🚀 Engine Acting as Executor for {self.agent.name} using {step_method}()...")
+        if signals is not None:
+            if len(signals) != len(ltf_data):
+                raise ValueError(f"Expected {len(ltf_data)} precomputed signals, got {len(signals)}")
+            print(f"🚀 Engine Acting as Executor for {self.agent.name} using precomputed signals...")
+        else:
+            if not hasattr(self.agent, step_method):
+                raise AttributeError(f"Agent '{self.agent.name}' is missing the method: {step_method}()")
+            process_method = getattr(self.agent, step_method)
+            print(f"🚀 Engine Acting as Executor for {self.agent.name} using {step_method}()...")
 
-        for ltf_candle in ltf_data:
+        for i, ltf_candle in enumerate(ltf_data):
             if is_mtf:
-                while htf_idx < len(htf_data) and htf_data[htf_idx].timestamp <= ltf_candle.timestamp:
-                    self.agent.on_htf_candle(htf_data[htf_idx])
-                    htf_idx += 1
+                while next_htf is not None and next_htf.timestamp <= ltf_candle.timestamp:
+                    self.agent.on_htf_candle(next_htf)
+                    next_htf = next(htf_candles, None)
 
             self.broker.update_market_movement(ltf_candle)
 
-            signal = process_method(ltf_candle)
+            signal = signals[i] if signals is not None else process_method(ltf_candle)
 
             if signal:
                 if isinstance(signal, list):
@@ -77,11 +86,7 @@ class UnifiedEngine:
                 else:
                     self._execute_signal_as_executor(signal, ltf_candle.timestamp, ltf_candle.close)
 
-            equity_curve.append({
-                'timestamp': ltf_candle.timestamp,
-                'balance': self.broker.balance,
-                'equity': self.broker.equity,
-                'dd': self.broker.max_drawdown_percent
-            })
+            equity_curve.append(ltf_candle.timestamp, self.broker.balance, self.broker.equity,
+                                self.broker.max_drawdown_percent)
 
         return self.broker, equity_curve
\ No newline at end of file
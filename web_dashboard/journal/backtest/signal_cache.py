@@ -0,0 +1,159 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sys
+import tempfile
+from typing import Any, Callable, List, Optional
+import numpy as np
+from trader.domain.models import CandleBatch
+
+# Disk budget for cached signal streams; least recently used entries go first.
+MAX_BYTES = 512 * 1024 * 1024
+
+
+def candles_fingerprint(*series) -> str:
+    """Content hash of candle sequences (symbol, timestamps and OHLCV of every row)."""
+    digest = hashlib.sha256()
+    for candles in series:
+        batch = CandleBatch.from_candles(candles)
+        digest.update(f"{batch.symbol}:{len(batch)};".encode())
+        for name in CandleBatch.COLUMNS:
+            digest.update(np.ascontiguousarray(getattr(batch, name)).data)
+    return digest.hexdigest()
+
+
+def _dependencies(module_name: str) -> List[str]:
+    """The module plus every module of its own top-level package it takes names from, transitively."""
+    package = module_name.split('.')[0]
+    seen, pending = set(), [module_name]
+    while pending:
+        name = pending.pop()
+        if name in seen or name not in sys.modules: continue
+        seen.add(name)
+        for value in vars(sys.modules[name]).values():
+            owner = value.__name__ if inspect.ismodule(value) else getattr(value, '__module__', None)
+            if isinstance(owner, str) and owner.split('.')[0] == package:
+                pending.append(owner)
+    return sorted(seen)
+
+
+@functools.lru_cache(maxsize=None)
+def _source_hash(module_name: str) -> str:
+    digest = hashlib.sha256()
+    for name in _dependencies(module_name):
+        try:
+            source = inspect.getsource(sys.modules[name])
+        except (OSError, TypeError):
+            source = ''
+        digest.update(f"{name}:{len(source)};{source}".encode())
+    return digest.hexdigest()
+
+
+class SignalCache:
+    """Persistent signal streams, keyed by agent class, parameters and input candles.
+
+    The key covers everything an agent's signals depend on and nothing the broker does,
+    so a rerun with different spread, stop level or leverage replays the stored stream
+    instead of generating it again. The source of the agent module and of every trader
+    module it draws on (indicators, k-NN, pivots, models, ...) is part of the key, so
+    editing the strategy or the code under it invalidates its entries.
+    """
+
+    def __init__(self, root: str, max_bytes: int = MAX_BYTES):
+        self.root = str(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    def key(self, agent, *series) -> str:
+        cls = type(agent)
+        identity = json.dumps({
+            'agent': f"{cls.__module__}.{cls.__qualname__}",
+            'source': _source_hash(cls.__module__),
+            'name': agent.name,
+            'magic_number': agent.magic_number,
+            'params': agent.parameters,
+        }, sort_keys=True, default=repr)
+        return hashlib.sha256(f"{identity}|{candles_fingerprint(*series)}".encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.pkl")
+
+    def get(self, key: str) -> Optional[List[Any]]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                length, entries = pickle.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (EOFError, pickle.UnpicklingError, ValueError):
+            self._remove(path)
+            return None
+        signals = [None] * length
+        for i, signal in entries:
+            signals[i] = signal
+        return signals
+
+    def put(self, key: str, signals: List[Any]):
+        # Streams are sparse: only the bars that carry a signal are stored.
+        entries = [(i, signal) for i, signal in enumerate(signals) if signal]
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((len(signals), entries), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))
+        self.evict()
+
+    def signals(self, agent, compute: Callable[[], List[Any]], *series) -> List[Any]:
+        """The agent's signals for ``series``, from the cache or from ``compute()``."""
+        key = self.key(agent, *series)
+        signals = self.get(key)
+        if signals is not None:
+            self.hits += 1
+            print(f"♻️ Replaying cached signals for {agent.name} ({key[:12]})")
+            return signals
+        self.misses += 1
+        signals = compute()
+        self.put(key, signals)
+        return signals
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> int:
+        """Deletes least recently used entries until the cache fits ``max_bytes``."""
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= self.max_bytes: break
+            self._remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        for path, _, _ in self._entries():
+            self._remove(path)
+
+    def _entries(self):
+        for name in os.listdir(self.root):
+            if not name.endswith('.pkl'): continue
+            path = os.path.join(self.root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            yield path, stat.st_size, stat.st_mtime_ns
+
+    @staticmethod
+    def _remove(path: str):
+        # Another process sharing the cache may have evicted it already.
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
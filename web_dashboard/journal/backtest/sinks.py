@@ -0,0 +1,184 @@
+import os
+import pickle
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+import numpy as np
+from trader.domain.models import to_epoch_ns, from_epoch_ns
+
+
+# --- decimation -------------------------------------------------------------
+
+def minmax_indices(values: np.ndarray, max_points: int) -> np.ndarray:
+    """Sorted indices keeping the lowest and highest value of each bucket, plus both endpoints.
+
+    Unlike plain ``[::step]`` thinning, every trough and peak of the series survives.
+    """
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+    buckets = max(1, (max_points - 2) // 2)
+    size = -(-n // buckets)
+    buckets = -(-n // size)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = values
+    padded = padded.reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    keep = np.concatenate([[0, n - 1], offsets + np.nanargmin(padded, axis=1), offsets + np.nanargmax(padded, axis=1)])
+    return np.unique(keep)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: per bucket, the point spanning the largest triangle with its neighbours."""
+    n = len(y)
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    keep = np.empty(max_points, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[nxt_lo:nxt_hi].mean(), y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+# Saved equity curves are decimated to about this many points.
+EQUITY_POINTS = 1000
+
+DECIMATORS = {
+    'minmax': lambda columns, n: minmax_indices(columns['equity'], n),
+    'lttb': lambda columns, n: lttb_indices(columns['timestamp'], columns['equity'], n),
+}
+
+
+# --- equity curve -----------------------------------------------------------
+
+class EquitySeries:
+    """Equity curve sink: one row per bar in growable NumPy columns.
+
+    With ``spill_dir`` the rows are written to ``<spill_dir>/<column>.bin`` every
+    ``batch_size`` appends and read back memory-mapped, so memory stays bounded on
+    multi-year runs. ``decimate`` thins the curve without dropping drawdown troughs.
+    """
+    COLUMNS = {
+        'timestamp': np.dtype('<i8'),
+        'balance': np.dtype('<f8'),
+        'equity': np.dtype('<f8'),
+        'dd': np.dtype('<f8'),
+    }
+
+    def __init__(self, capacity: int = 4096, spill_dir: Optional[str] = None, batch_size: int = 65536):
+        self.spill_dir = spill_dir
+        self.batch_size = batch_size
+        self._spilled = 0
+        self._size = 0
+        self._buffers = {name: np.empty(batch_size if spill_dir else capacity, dtype=dtype)
+                         for name, dtype in self.COLUMNS.items()}
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            for name in self.COLUMNS:
+                open(self._path(name), 'wb').close()
+
+    @classmethod
+    def from_columns(cls, timestamps: np.ndarray, balances: np.ndarray, equities: np.ndarray,
+                     dd: np.ndarray) -> 'EquitySeries':
+        series = cls(capacity=max(1, len(timestamps)))
+        for name, column in zip(cls.COLUMNS, (timestamps, balances, equities, dd)):
+            series._buffers[name][:len(column)] = column
+        series._size = len(timestamps)
+        return series
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.spill_dir, f"{name}.bin")
+
+    def __len__(self):
+        return self._spilled + self._size
+
+    def append(self, timestamp: datetime, balance: float, equity: float, dd: float):
+        i = self._size
+        if i == len(self._buffers['timestamp']):
+            if self.spill_dir:
+                self.flush()
+                i = 0
+            else:
+                self._buffers = {name: np.concatenate([b, np.empty_like(b)]) for name, b in self._buffers.items()}
+        buffers = self._buffers
+        buffers['timestamp'][i] = to_epoch_ns(timestamp)
+        buffers['balance'][i] = balance
+        buffers['equity'][i] = equity
+        buffers['dd'][i] = dd
+        self._size = i + 1
+
+    def flush(self):
+        if not self.spill_dir or self._size == 0: return
+        for name, buffer in self._buffers.items():
+            with open(self._path(name), 'ab') as f:
+                f.write(buffer[:self._size].tobytes())
+        self._spilled += self._size
+        self._size = 0
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        if not self.spill_dir:
+            return {name: buffer[:self._size] for name, buffer in self._buffers.items()}
+        self.flush()
+        if self._spilled == 0:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in self.COLUMNS.items()}
+        return {name: np.memmap(self._path(name), dtype=dtype, mode='r', shape=(self._spilled,))
+                for name, dtype in self.COLUMNS.items()}
+
+    def decimate(self, max_points: int, method: str = 'minmax') -> 'EquitySeries':
+        columns = self.columns()
+        keep = DECIMATORS[method](columns, max_points)
+        return EquitySeries.from_columns(*(np.asarray(columns[name][keep]) for name in self.COLUMNS))
+
+    def points(self) -> List[Dict[str, Any]]:
+        columns = self.columns()
+        return [
+            {'timestamp': from_epoch_ns(ts), 'balance': b, 'equity': e, 'dd': dd}
+            for ts, b, e, dd in zip(columns['timestamp'].tolist(), columns['balance'].tolist(),
+                                    columns['equity'].tolist(), columns['dd'].tolist())
+        ]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.points())
+
+
+# --- closed trades ----------------------------------------------------------
+
+class TradeLog:
+    """List-like closed-trade sink for the broker's ``closed_history``.
+
+    With ``spill_path`` completed trades are pickled to disk in batches of ``batch_size``
+    and only the current batch stays in memory; iteration replays the file first.
+    """
+
+    def __init__(self, spill_path: Optional[str] = None, batch_size: int = 1000):
+        self.spill_path = spill_path
+        self.batch_size = batch_size
+        self._spilled = 0
+        self._batch: List[Dict[str, Any]] = []
+        if spill_path:
+            open(spill_path, 'wb').close()
+
+    def __len__(self):
+        return self._spilled + len(self._batch)
+
+    def append(self, trade: Dict[str, Any]):
+        self._batch.append(trade)
+        if self.spill_path and len(self._batch) >= self.batch_size:
+            with open(self.spill_path, 'ab') as f:
+                pickle.dump(self._batch, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self._spilled += len(self._batch)
+            self._batch = []
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        if self._spilled:
+            with open(self.spill_path, 'rb') as f:
+                for _ in range(self._spilled // self.batch_size):
+                    yield from pickle.load(f)
+        yield from list(self._batch)
@@ -0,0 +1,69 @@
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+import numpy as np
+from trader.data.candle_store import CandleStore
+from trader.domain.models import to_epoch_ns
+
+TICKS = CandleStore.TICKS
+
+
+class SubBarFeed:
+    """Forward-only intrabar price path read from a CandleStore in bounded chunks.
+
+    Each M1 (or any finer) sub-bar expands to the broker's usual 4-point path, O-L-H-C for
+    up bars and O-H-L-C for down bars. Tick streams (``timeframe_minutes=TICKS``) replay
+    every stored bid as is. Only one chunk of ``chunk_rows`` rows is copied out of the
+    memory map at a time, so bars have to be requested in time order.
+    """
+
+    def __init__(self, store: CandleStore, symbol: str, timeframe_minutes: int = 1, chunk_rows: int = 65536):
+        self.is_ticks = timeframe_minutes == TICKS
+        self.chunk_rows = chunk_rows
+        self._columns = store.read(symbol, timeframe_minutes)
+        self._rows = len(self._columns['timestamp'])
+        self._base = 0
+        self._chunk: Optional[Dict[str, np.ndarray]] = None
+
+    def __len__(self):
+        return self._rows
+
+    def _load(self, lo: int, rows: int):
+        hi = min(lo + rows, self._rows)
+        self._base = lo
+        self._chunk = {name: np.array(column[lo:hi]) for name, column in self._columns.items()}
+
+    def _slice(self, start_ns: int, end_ns: int) -> Dict[str, np.ndarray]:
+        chunk = self._chunk
+        if chunk is None or not len(chunk['timestamp']) or start_ns < chunk['timestamp'][0] \
+                or start_ns > chunk['timestamp'][-1]:
+            lo = int(np.searchsorted(self._columns['timestamp'], start_ns, side='left'))
+            self._load(lo, self.chunk_rows)
+            chunk = self._chunk
+
+        # A window running past the end of the chunk reloads it from the window start, larger if need be.
+        rows = self.chunk_rows
+        while self._base + len(chunk['timestamp']) < self._rows and chunk['timestamp'][-1] < end_ns:
+            lo = self._base + int(np.searchsorted(chunk['timestamp'], start_ns, side='left'))
+            if lo > self._base: rows = self.chunk_rows
+            else: rows *= 2
+            self._load(lo, rows)
+            chunk = self._chunk
+
+        ts = chunk['timestamp']
+        lo, hi = np.searchsorted(ts, start_ns, side='left'), np.searchsorted(ts, end_ns, side='left')
+        return {name: column[lo:hi] for name, column in chunk.items()}
+
+    def path(self, start: datetime, end: datetime) -> Tuple[np.ndarray, np.ndarray]:
+        """Timestamps (int64 ns) and prices of every intrabar point with ``start <= t < end``."""
+        rows = self._slice(to_epoch_ns(start), to_epoch_ns(end))
+        if self.is_ticks:
+            return rows['timestamp'], rows['close']
+
+        up = rows['close'] >= rows['open']
+        prices = np.column_stack([
+            rows['open'],
+            np.where(up, rows['low'], rows['high']),
+            np.where(up, rows['high'], rows['low']),
+            rows['close'],
+        ]).ravel()
+        return np.repeat(rows['timestamp'], 4), prices
@@ -0,0 +1,248 @@
+import heapq
+import itertools
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from trader.domain.models import Candle, CandleBatch
+from trader.agents.lorentzian_agent import LorentzianClassificationAgent
+from trader.agents.mtf_sfp_agent import MultiTimeframeSFPAgent
+from journal.backtest.virtual_broker import AdvancedVirtualBroker
+from journal.backtest.engine import UnifiedEngine
+from journal.backtest.sinks import EQUITY_POINTS
+from journal.backtest.signal_cache import SignalCache
+
+
+class SharedCandles:
+    """One candle series in a shared-memory block.
+
+    Pickling only sends the block's name, so every worker process attaches to the
+    same physical pages instead of receiving its own copy of the dataset.
+    """
+    FLOAT_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, symbol: str, length: int, shm: shared_memory.SharedMemory):
+        self.symbol = symbol
+        self.length = length
+        self._shm = shm
+        self.timestamps = np.ndarray((length,), dtype=np.int64, buffer=shm.buf)
+        self.prices = np.ndarray((len(self.FLOAT_COLUMNS), length), dtype=np.float64, buffer=shm.buf,
+                                 offset=length * 8)
+
+    @classmethod
+    def create(cls, symbol: str, candles: List[Candle]) -> 'SharedCandles':
+        batch = CandleBatch.from_candles(candles, symbol)
+        n = len(batch)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, n * 8 * (1 + len(cls.FLOAT_COLUMNS))))
+        block = cls(symbol, n, shm)
+        block.timestamps[:] = batch.timestamp
+        for i, name in enumerate(cls.FLOAT_COLUMNS):
+            block.prices[i] = getattr(batch, name)
+        return block
+
+    def __getstate__(self):
+        return {'symbol': self.symbol, 'length': self.length, 'name': self._shm.name}
+
+    def __setstate__(self, state):
+        shm = shared_memory.SharedMemory(name=state['name'])
+        # The creating process owns the block; stop this process's tracker from unlinking it at exit.
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        self.__init__(state['symbol'], state['length'], shm)
+
+    def candles(self) -> CandleBatch:
+        """The candles as views into the shared block; valid until ``close``."""
+        return CandleBatch(self.symbol, self.timestamps, *self.prices)
+
+    def close(self):
+        self.timestamps = self.prices = None
+        self._shm.close()
+
+    def unlink(self):
+        self.close()
+        self._shm.unlink()
+
+
+# --- strategies -------------------------------------------------------------
+
+def _new_broker(settings: Dict[str, Any]) -> AdvancedVirtualBroker:
+    return AdvancedVirtualBroker(
+        initial_balance=settings['balance'],
+        spread=settings['spread'],
+        digits=2,
+        stop_level_points=10
+    )
+
+
+def _signals(agent, settings: Dict[str, Any], compute: Callable[[], List[Any]], *series) -> List[Any]:
+    # With settings['signal_cache'] (a directory) runs differing only in broker settings replay stored signals.
+    if not settings.get('signal_cache'):
+        return compute()
+    return SignalCache(settings['signal_cache']).signals(agent, compute, *series)
+
+
+def _run_lorentzian(params: Dict[str, Any], data: Dict[int, List[Candle]], settings: Dict[str, Any]):
+    candles = data[settings['timeframe']]
+    warmup = settings['warmup_candles']
+    # An optional (start, end) window trades candles[start:end], warmed up on the bars just before it.
+    start, end = settings.get('window', (warmup, len(candles)))
+    agent = LorentzianClassificationAgent("Lorentzian_BT", magic_number=5005).configure(**params)
+    warmup_data, trading_data = candles[start - warmup:start], candles[start:end]
+
+    def compute():
+        agent.warm_up(warmup_data)
+        return agent.precompute_signals(trading_data)
+
+    signals = _signals(agent, settings, compute, warmup_data, trading_data)
+    return UnifiedEngine(agent, _new_broker(settings)).run(ltf_data=trading_data, signals=signals)
+
+
+def _run_sfp(params: Dict[str, Any], data: Dict[int, List[Candle]], settings: Dict[str, Any]):
+    agent = MultiTimeframeSFPAgent("SFP_Backtest", 888).configure(**params)
+    signals = _signals(agent, settings, lambda: agent.precompute_signals(data[1], data[15]), data[1], data[15])
+    return UnifiedEngine(agent, _new_broker(settings)).run(ltf_data=data[1], signals=signals)
+
+
+STRATEGIES = {
+    'lorentzian': {
+        'agent': LorentzianClassificationAgent,
+        'run': _run_lorentzian,
+        'counts': lambda s: {s['timeframe']: s['days'] * (1440 // s['timeframe']) + s['warmup_candles']},
+        'trading_data': lambda s, data: data[s['timeframe']][s['warmup_candles']:],
+        'timeframe': lambda s: f"M{s['timeframe']}",
+    },
+    'sfp': {
+        'agent': MultiTimeframeSFPAgent,
+        'run': _run_sfp,
+        'counts': lambda s: {1: s['days'] * 1440, 15: s['days'] * 100},
+        'trading_data': lambda s, data: data[1],
+        'timeframe': lambda s: "M1/M15",
+    },
+}
+
+
+# --- parameter specs --------------------------------------------------------
+
+def grid(spec: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    names = list(spec)
+    return [dict(zip(names, values)) for values in itertools.product(*(spec[n] for n in names))]
+
+
+def random_search(spec: Dict[str, Any], samples: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Lists are sampled as choices, ``{"low": a, "high": b}`` uniformly (as ints when both bounds are ints)."""
+    rng = random.Random(seed)
+    param_sets = []
+    for _ in range(samples):
+        params = {}
+        for name, dist in spec.items():
+            if isinstance(dist, dict):
+                low, high = dist['low'], dist['high']
+                if isinstance(low, int) and isinstance(high, int):
+                    params[name] = rng.randint(low, high)
+                else:
+                    params[name] = rng.uniform(low, high)
+            else:
+                params[name] = rng.choice(dist)
+        param_sets.append(params)
+    return param_sets
+
+
+def validate_params(agent_cls, param_sets: List[Dict[str, Any]]):
+    for params in param_sets:
+        unknown = set(params) - set(agent_cls.PARAMETERS)
+        if unknown:
+            raise ValueError(f"{agent_cls.__name__} has no tunable parameters {sorted(unknown)}")
+
+
+# --- worker side ------------------------------------------------------------
+
+_worker_data: Dict[int, CandleBatch] = {}
+_worker_blocks: Dict[int, SharedCandles] = {}
+
+
+def _init_worker(blocks: Dict[int, SharedCandles]):
+    sys.stdout = open(os.devnull, 'w')
+    _worker_blocks.update(blocks)
+    for tf, block in blocks.items():
+        _worker_data[tf] = block.candles()
+
+
+def summarize(broker, initial_balance: float) -> Dict[str, float]:
+    history = broker.closed_history
+    wins = sum(t['net_profit'] for t in history if t['net_profit'] > 0)
+    losses = -sum(t['net_profit'] for t in history if t['net_profit'] < 0)
+    return {
+        'net_profit': broker.balance - initial_balance,
+        'final_balance': broker.balance,
+        'total_trades': len(history),
+        'win_rate': (sum(1 for t in history if t['net_profit'] > 0) / len(history) * 100) if history else 0.0,
+        'profit_factor': wins / losses if losses > 0 else (float('inf') if wins > 0 else 0.0),
+        'max_drawdown_percent': broker.max_drawdown_percent,
+    }
+
+
+def _run_one(strategy: str, index: int, params: Dict[str, Any], settings: Dict[str, Any]):
+    broker, _ = STRATEGIES[strategy]['run'](params, _worker_data, settings)
+    return index, summarize(broker, settings['balance'])
+
+
+def _run_full(strategy: str, index: int, params: Dict[str, Any], settings: Dict[str, Any]):
+    broker, equity_curve = STRATEGIES[strategy]['run'](params, _worker_data, settings)
+    # Same decimation save_backtest_results applies, done here so only ~1000 points cross the process boundary.
+    return index, broker, equity_curve.decimate(EQUITY_POINTS)
+
+
+# --- driver -----------------------------------------------------------------
+
+RANKINGS: Dict[str, Callable[[Dict[str, float]], float]] = {
+    'net_profit': lambda m: m['net_profit'],
+    'win_rate': lambda m: m['win_rate'],
+    'profit_factor': lambda m: m['profit_factor'],
+    'max_drawdown_percent': lambda m: -m['max_drawdown_percent'],
+}
+
+
+def run_sweep(strategy: str, param_sets: List[Dict[str, Any]], data: Dict[int, List[Candle]],
+              settings: Dict[str, Any], workers: Optional[int] = None, top_k: int = 5,
+              rank_by: str = 'net_profit') -> Tuple[List[Dict[str, Any]], List[Tuple]]:
+    """Runs every parameter set in a process pool over one shared copy of ``data``.
+
+    Returns the ranked summary rows for all runs and ``(row, broker, equity_curve)`` for the best ``top_k``.
+    Workers only send summaries back; the best ``top_k`` runs are run again for their broker and curve.
+    """
+    validate_params(STRATEGIES[strategy]['agent'], param_sets)
+    score = RANKINGS[rank_by]
+    symbol = next(iter(data.values()))[0].symbol
+    blocks = {tf: SharedCandles.create(symbol, candles) for tf, candles in data.items()}
+    rows, best = [], []
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker,
+                                 initargs=(blocks,)) as pool:
+            futures = [pool.submit(_run_one, strategy, i, params, settings) for i, params in enumerate(param_sets)]
+            for done, future in enumerate(as_completed(futures), 1):
+                index, metrics = future.result()
+                row = {'run': index, 'params': param_sets[index], **metrics}
+                rows.append(row)
+                # Ties go to the earlier run, so the selection does not depend on completion order.
+                entry = (score(metrics), -index, row)
+                if len(best) < top_k:
+                    heapq.heappush(best, entry)
+                elif entry[:2] > best[0][:2]:
+                    heapq.heapreplace(best, entry)
+                print(f"\r⚙️ {done}/{len(param_sets)} runs complete", end="")
+            print()
+
+            best = [row for _, _, row in sorted(best, key=lambda e: e[:2], reverse=True)]
+            replays = [pool.submit(_run_full, strategy, row['run'], row['params'], settings) for row in best]
+            full = {index: (broker, curve) for index, broker, curve in (f.result() for f in replays)}
+    finally:
+        for block in blocks.values():
+            block.unlink()
+
+    rows.sort(key=lambda r: (-score(r), r['run']))
+    for rank, row in enumerate(rows, 1):
+        row['rank'] = rank
+    top = [(row, *full[row['run']]) for row in best]
+    return rows, top
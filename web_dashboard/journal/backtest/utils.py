@@ -1,18 +1,77 @@
+import os
 import logging
-from typing import List, Dict, Any
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from django.conf import settings
 from django.db import transaction
 from django.utils.timezone import make_aware
-from journal.models import BacktestSession, Trade, EquityPoint
+from trader.data.candle_store import CandleStore
+from journal.models import BacktestSession
 from journal.backtest.chart_generator import export_tv_data
+from journal.backtest.sinks import EquitySeries, EQUITY_POINTS
+from journal.backtest.signal_cache import SignalCache
+from journal.backtest.writer import BulkResultWriter
 
 logger = logging.getLogger(__name__)
 
+
+def get_candle_store() -> CandleStore:
+    return CandleStore(os.path.join(settings.BASE_DIR, 'media', 'candles'))
+
+
+def get_signal_cache_dir() -> str:
+    return os.path.join(settings.BASE_DIR, 'media', 'signal_cache')
+
+
+def get_signal_cache() -> SignalCache:
+    return SignalCache(get_signal_cache_dir())
+
+
+def sync_candles(store: CandleStore, symbol: str, counts: Dict[int, int]) -> bool:
+    """Tops the store up from MetaTrader 5 with only the bars it is missing."""
+    from trader.executor.mt5_executor import MT5Executor
+    mt5 = MT5Executor()
+    if not mt5.connect():
+        return False
+    try:
+        for tf, count in counts.items():
+            store.sync(mt5, symbol, tf, count)
+    finally:
+        mt5.shutdown()
+    return True
+
+
+def sync_ticks(store: CandleStore, symbol: str, start: datetime, end: datetime) -> bool:
+    """Tops the store's ticks up from MetaTrader 5 over ``[start, end)`` (naive wall-clock times)."""
+    from trader.executor.mt5_executor import MT5Executor
+    mt5 = MT5Executor()
+    if not mt5.connect():
+        return False
+    try:
+        added = store.sync_ticks(mt5, symbol, start, end)
+        print(f"📥 Stored {added} new ticks for {symbol}")
+    finally:
+        mt5.shutdown()
+    return True
+
+
+def load_candles(symbol: str, counts: Dict[int, int], offline: bool = False) -> Dict[int, List[Any]]:
+    """Returns the last `count` candles per timeframe from the local store.
+
+    Unless `offline`, the store is first topped up from MetaTrader 5 with only the bars it is missing.
+    """
+    store = get_candle_store()
+    if not offline and not sync_candles(store, symbol, counts):
+        return {tf: [] for tf in counts}
+    return {tf: store.read_candles(symbol, tf, count=count) for tf, count in counts.items()}
+
+
 def save_backtest_results(
     agent_name: str, symbol: str, timeframe: str, initial_balance: float,
-    spread: float, candles: List[Any], broker: Any, equity_curve: List[Dict[str, Any]]
-) -> None:
+    spread: float, candles: List[Any], broker: Any, equity_curve: EquitySeries
+) -> Optional[BacktestSession]:
     if not broker.closed_history:
-        return
+        return None
 
     total_trades = len(broker.closed_history)
     winning_trades = [t for t in broker.closed_history if t['net_profit'] > 0]
@@ -36,38 +95,13 @@ def save_backtest_results(
                 total_trades=total_trades
             )
 
-            Trade.objects.bulk_create([
-                Trade(
-                    session=session,
-                    ticket=t['ticket'],
-                    direction=t['type'].name,
-                    entry_price=t['entry_price'],
-                    exit_price=t['exit_price'],
-                    sl=t.get('sl', 0.0),
-                    tp=t.get('tp', 0.0),
-                    volume=t['volume'],
-                    gross_profit=t['gross_profit'],
-                    net_profit=t['net_profit'],
-                    open_time=make_aware(t['open_time']),
-                    close_time=make_aware(t['close_time']),
-                    duration_minutes=t['duration'],
-                    entry_reason=t['entry_reason'],
-                    exit_reason=t['exit_reason']
-                ) for t in broker.closed_history
-            ], batch_size=1000)
-
-            step = max(1, len(equity_curve) // 1000)
-            EquityPoint.objects.bulk_create([
-                EquityPoint(
-                    session=session,
-                    timestamp=make_aware(p['timestamp']),
-                    balance=p['balance'],
-                    equity=p['equity'],
-                    drawdown_percent=p['dd']
-                ) for p in equity_curve[::step]
-            ], batch_size=2000)
-
-        export_tv_data(session.id, candles, broker.closed_history)
+            writer = BulkResultWriter(session.id)
+            writer.write_trades(broker.closed_history)
+            writer.write_equity(equity_curve.decimate(EQUITY_POINTS))
+
+        export_tv_data(session.id, candles)
+        return session
 
     except Exception as e:
-        logger.error(f"Failed to save backtest results: {str(e)}")
\ No newline at end of file
+        logger.error(f"Failed to save backtest results: {str(e)}")
+        return None
\ No newline at end of file
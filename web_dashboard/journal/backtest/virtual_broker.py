@@ -1,10 +1,93 @@
-from trader.domain.models import SignalType
-from datetime import datetime
+from trader.domain.models import SignalType, from_epoch_ns
+from datetime import datetime, timedelta
+from typing import List
+import numpy as np
+
+
+class PositionBook:
+    """Open positions as parallel NumPy columns (structure of arrays), ordered by ticket.
+
+    The hot fields live in arrays so SL/TP detection and floating P&L are single masked
+    passes; the original position dicts are kept alongside for reporting.
+    """
+    COLUMNS = ('ticket', 'is_buy', 'entry', 'volume', 'sl', 'tp')
+
+    def __init__(self, capacity: int = 64):
+        self.size = 0
+        self.ticket = np.zeros(capacity, dtype=np.int64)
+        self.is_buy = np.zeros(capacity, dtype=bool)
+        self.entry = np.zeros(capacity)
+        self.volume = np.zeros(capacity)
+        self.sl = np.zeros(capacity)
+        self.tp = np.zeros(capacity)
+        self.records: List[dict] = []
+        self._refresh_triggers()
+
+    def __len__(self):
+        return self.size
+
+    def add(self, pos: dict):
+        if self.size == len(self.ticket):
+            for name in self.COLUMNS:
+                column = getattr(self, name)
+                setattr(self, name, np.concatenate([column, np.zeros_like(column)]))
+        i = self.size
+        self.ticket[i] = pos['ticket']
+        self.is_buy[i] = pos['type'] == SignalType.BUY
+        self.entry[i] = pos['entry_price']
+        self.volume[i] = pos['volume']
+        self.sl[i] = pos['sl']
+        self.tp[i] = pos['tp']
+        self.records.append(pos)
+        self.size += 1
+        sl, tp = float(pos['sl']), float(pos['tp'])
+        if self.is_buy[i]:
+            if sl > 0: self.buy_sl_max = max(self.buy_sl_max, sl)
+            if tp > 0: self.buy_tp_min = min(self.buy_tp_min, tp)
+        else:
+            if sl > 0: self.sell_sl_min = min(self.sell_sl_min, sl)
+            if tp > 0: self.sell_tp_max = max(self.sell_tp_max, tp)
+
+    def find(self, ticket: int) -> int:
+        i = int(np.searchsorted(self.ticket[:self.size], ticket))
+        return i if i < self.size and self.ticket[i] == ticket else -1
+
+    def remove(self, rows: np.ndarray):
+        keep = np.ones(self.size, dtype=bool)
+        keep[rows] = False
+        n = int(keep.sum())
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            column[:n] = column[:self.size][keep]
+        self.records = [r for r, k in zip(self.records, keep.tolist()) if k]
+        self.size = n
+        self._refresh_triggers()
+
+    def _refresh_triggers(self):
+        # Nearest SL/TP levels per side: a tick strictly inside them cannot hit anything.
+        n = self.size
+        is_buy, sl, tp = self.is_buy[:n], self.sl[:n], self.tp[:n]
+        self.buy_sl_max = float(sl[is_buy & (sl > 0)].max(initial=-np.inf))
+        self.buy_tp_min = float(tp[is_buy & (tp > 0)].min(initial=np.inf))
+        self.sell_sl_min = float(sl[~is_buy & (sl > 0)].min(initial=np.inf))
+        self.sell_tp_max = float(tp[~is_buy & (tp > 0)].max(initial=-np.inf))
+
+    def may_trigger(self, bid: float, ask: float) -> bool:
+        return not (self.buy_sl_max < bid < self.buy_tp_min and self.sell_tp_max < ask < self.sell_sl_min)
+
+    def may_trigger_within(self, bid_low: float, bid_high: float, ask_low: float, ask_high: float) -> bool:
+        """Whether any tick with bid/ask inside these ranges could hit a stop or target."""
+        return not (self.buy_sl_max < bid_low and bid_high < self.buy_tp_min
+                    and self.sell_tp_max < ask_low and ask_high < self.sell_sl_min)
 
 
 class AdvancedVirtualBroker:
+    # Below this many open positions a plain loop beats NumPy's per-call overhead.
+    VECTOR_MIN_POSITIONS = 16
+
     def __init__(self, initial_balance=10000.0, spread=0.15, digits=2, leverage=100, contract_size=100,
-                 commission_per_lot=3.0, stop_level_points=10):
+                 commission_per_lot=3.0, stop_level_points=10, sub_bars=None, bar_minutes=None,
+                 closed_history=None):
         # Financial Accounts
         self.balance = initial_balance
         self.equity = initial_balance
@@ -23,9 +106,17 @@ class AdvancedVirtualBroker:
         self.commission_per_lot = commission_per_lot
         self.stop_level_points = stop_level_points
 
+        # Optional high-fidelity path: a SubBarFeed replayed inside bars that can hit a stop or target
+        self.sub_bars = sub_bars
+        self.bar_span = timedelta(minutes=bar_minutes) if bar_minutes else None
+        if sub_bars is not None and self.bar_span is None:
+            raise ValueError("bar_minutes is required to replay sub-bars")
+        self.sub_bar_expansions = 0
+
         # Database
-        self.positions = {}  # Dictionary for direct ticket lookup
-        self.closed_history = []
+        self.book = PositionBook()
+        # Any list-like sink with append/len/iter, e.g. a spilling TradeLog
+        self.closed_history = [] if closed_history is None else closed_history
         self.ticket_counter = 1
 
     def normalize(self, price: float) -> float:
@@ -34,46 +125,68 @@ class AdvancedVirtualBroker:
     def get_bid_ask(self, price: float):
         return self.normalize(price), self.normalize(price + self.spread)
 
+    @property
+    def positions(self):
+        return {pos['ticket']: pos for pos in self.book.records}
+
     def get_positions(self, symbol=None):
         if symbol:
-            return [p for p in self.positions.values() if p['symbol'] == symbol]
-        return list(self.positions.values())
+            return [p for p in self.book.records if p['symbol'] == symbol]
+        return list(self.book.records)
 
     def update_market_movement(self, candle):
-        if candle.close >= candle.open:
-            ticks = [candle.open, candle.low, candle.high, candle.close]
-        else:
-            ticks = [candle.open, candle.high, candle.low, candle.close]
-
-        for tick_price in ticks:
-            bid, ask = self.get_bid_ask(tick_price)
-            self._check_sl_tp(bid, ask, candle.timestamp)
+        if self.book.size:
+            # Fast path: no stop or target inside the bar's range means no tick of it can close anything.
+            bid_low, ask_low = self.get_bid_ask(candle.low)
+            bid_high, ask_high = self.get_bid_ask(candle.high)
+            if self.book.may_trigger_within(bid_low, bid_high, ask_low, ask_high):
+                if self.sub_bars is None or not self._replay_sub_bars(candle):
+                    if candle.close >= candle.open:
+                        ticks = [candle.open, candle.low, candle.high, candle.close]
+                    else:
+                        ticks = [candle.open, candle.high, candle.low, candle.close]
+
+                    for tick_price in ticks:
+                        bid, ask = self.get_bid_ask(tick_price)
+                        self._check_sl_tp(bid, ask, candle.timestamp)
 
         final_bid, final_ask = self.get_bid_ask(candle.close)
         self.update_equity(final_bid, final_ask)
 
+    def _replay_sub_bars(self, candle) -> bool:
+        timestamps, prices = self.sub_bars.path(candle.timestamp, candle.timestamp + self.bar_span)
+        if len(prices) == 0:
+            return False
+
+        self.sub_bar_expansions += 1
+        book = self.book
+        for ts, price in zip(timestamps.tolist(), prices.tolist()):
+            bid, ask = self.get_bid_ask(price)
+            if book.may_trigger(bid, ask):
+                self._check_sl_tp(bid, ask, from_epoch_ns(ts))
+                if not book.size: break
+        return True
+
     def _check_sl_tp(self, bid: float, ask: float, timestamp: datetime):
-        for ticket, pos in list(self.positions.items()):
-            exit_price = None
-            reason = ""
-
-            if pos['type'] == SignalType.BUY:
-                if pos['sl'] > 0 and bid <= pos['sl']:
-                    exit_price = min(pos['sl'], bid)  # Slippage: if bid gapped below SL, exit at bid
-                    reason = "SL"
-                elif pos['tp'] > 0 and bid >= pos['tp']:
-                    exit_price = max(pos['tp'], bid)
-                    reason = "TP"
-            else:
-                if pos['sl'] > 0 and ask >= pos['sl']:
-                    exit_price = max(pos['sl'], ask)  # Slippage: if ask gapped above SL, exit at ask
-                    reason = "SL"
-                elif pos['tp'] > 0 and ask <= pos['tp']:
-                    exit_price = min(pos['tp'], ask)
-                    reason = "TP"
-
-            if exit_price is not None:
-                self.close_position(ticket, exit_price, timestamp, reason, raw_price_provided=False)
+        book = self.book
+        n = book.size
+        if n == 0 or not book.may_trigger(bid, ask): return
+        is_buy, sl, tp = book.is_buy[:n], book.sl[:n], book.tp[:n]
+
+        sl_hit = (sl > 0) & np.where(is_buy, bid <= sl, ask >= sl)
+        tp_hit = ~sl_hit & (tp > 0) & np.where(is_buy, bid >= tp, ask <= tp)
+        rows = np.flatnonzero(sl_hit | tp_hit)
+        if len(rows) == 0: return
+
+        # Slippage: if the price gapped through the level, exit at the worse price.
+        exit_prices = np.where(
+            sl_hit,
+            np.where(is_buy, np.minimum(sl, bid), np.maximum(sl, ask)),
+            np.where(is_buy, np.maximum(tp, bid), np.minimum(tp, ask)),
+        )
+        for row in rows.tolist():
+            self._settle(row, float(exit_prices[row]), timestamp, "SL" if sl_hit[row] else "TP")
+        book.remove(rows)
 
     def open_position(self, direction: SignalType, volume: float, raw_price: float, sl: float, tp: float, symbol: str,
                       magic: int, comment: str, timestamp: datetime):
@@ -103,7 +216,7 @@ class AdvancedVirtualBroker:
             'commission': commission
         }
 
-        self.positions[self.ticket_counter] = new_pos
+        self.book.add(new_pos)
         self.ticket_counter += 1
 
         self.margin += required_margin
@@ -112,8 +225,9 @@ class AdvancedVirtualBroker:
 
     def close_position(self, ticket: int, raw_price: float, timestamp: datetime, reason: str,
                        raw_price_provided: bool = True):
-        if ticket not in self.positions: return
-        pos = self.positions[ticket]
+        row = self.book.find(ticket)
+        if row < 0: return
+        pos = self.book.records[row]
 
         if raw_price_provided:
             bid, ask = self.get_bid_ask(raw_price)
@@ -121,6 +235,15 @@ class AdvancedVirtualBroker:
         else:
             exit_price = raw_price
 
+        self._settle(row, exit_price, timestamp, reason)
+        self.book.remove(np.array([row]))
+
+        if raw_price_provided:
+            bid, ask = self.get_bid_ask(raw_price)
+            self.update_equity(bid, ask)
+
+    def _settle(self, row: int, exit_price: float, timestamp: datetime, reason: str):
+        pos = self.book.records[row]
         profit = 0
         if pos['type'] == SignalType.BUY:
             profit = (exit_price - pos['entry_price']) * pos['volume'] * self.contract_size
@@ -132,30 +255,33 @@ class AdvancedVirtualBroker:
         released_margin = (pos['volume'] * self.contract_size * pos['entry_price']) / self.leverage
         self.margin = max(0.0, self.margin - released_margin)
 
-        self.closed_history.append({
-            **pos,
-            'exit_price': self.normalize(exit_price),
-            'close_time': timestamp,
-            'gross_profit': profit,
-            'net_profit': profit - pos['commission'],
-            'exit_reason': reason,
-            'duration': (timestamp - pos['open_time']).total_seconds() / 60
-        })
-
-        del self.positions[ticket]
-
-        if raw_price_provided:
-            bid, ask = self.get_bid_ask(raw_price)
-            self.update_equity(bid, ask)
+        # The position leaves the book right after settling, so its dict becomes the trade record as is.
+        pos.update(
+            exit_price=self.normalize(exit_price),
+            close_time=timestamp,
+            gross_profit=profit,
+            net_profit=profit - pos['commission'],
+            exit_reason=reason,
+            duration=(timestamp - pos['open_time']).total_seconds() / 60
+        )
+        self.closed_history.append(pos)
 
     def update_equity(self, current_bid: float, current_ask: float):
         floating_pl = 0.0
-        for pos in self.positions.values():
-            current_price = current_bid if pos['type'] == SignalType.BUY else current_ask
-            if pos['type'] == SignalType.BUY:
-                floating_pl += (current_price - pos['entry_price']) * pos['volume'] * self.contract_size
-            else:
-                floating_pl += (pos['entry_price'] - current_price) * pos['volume'] * self.contract_size
+        n = self.book.size
+        if 0 < n < self.VECTOR_MIN_POSITIONS:
+            for pos in self.book.records:
+                if pos['type'] == SignalType.BUY:
+                    floating_pl += (current_bid - pos['entry_price']) * pos['volume'] * self.contract_size
+                else:
+                    floating_pl += (pos['entry_price'] - current_ask) * pos['volume'] * self.contract_size
+        elif n:
+            is_buy = self.book.is_buy[:n]
+            entry = self.book.entry[:n]
+            current_price = np.where(is_buy, current_bid, current_ask)
+            pl = np.where(is_buy, current_price - entry, entry - current_price) * self.book.volume[:n] * self.contract_size
+            # cumsum adds left to right like the scalar loop did, so equity stays bit-identical.
+            floating_pl = float(np.cumsum(pl)[-1])
 
         self.equity = self.balance + floating_pl
         self.free_margin = self.equity - self.margin
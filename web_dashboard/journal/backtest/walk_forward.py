@@ -0,0 +1,174 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from trader.domain.models import Candle
+from journal.backtest import sweep
+from journal.backtest.sinks import EquitySeries
+
+
+@dataclass
+class Fold:
+    index: int
+    train: Tuple[int, int]
+    test: Tuple[int, int]
+
+
+def make_folds(total: int, warmup: int, folds: int, in_sample_ratio: int = 3) -> List[Fold]:
+    """Rolling windows over ``total`` bars: each in-sample window is ``in_sample_ratio``
+    out-of-sample windows long and is immediately followed by its out-of-sample window.
+    The first ``warmup`` bars are only used to warm agents up."""
+    step = (total - warmup) // (folds + in_sample_ratio)
+    if step <= 0:
+        raise ValueError(f"{total} bars are not enough for {folds} folds after {warmup} warm-up bars")
+    result = []
+    for i in range(folds):
+        train_start = warmup + i * step
+        train_end = train_start + in_sample_ratio * step
+        result.append(Fold(i, (train_start, train_end), (train_end, train_end + step)))
+    return result
+
+
+class StitchedResult:
+    """Out-of-sample fold results chained into one broker-like result for save_backtest_results.
+
+    Positions still open when a fold's window ends are closed at its last bar. The maximum
+    drawdown combines each fold broker's own figures, which include equity updates between
+    bar closes, with the fold's lowest bar measured against the peak carried in from earlier folds.
+    """
+
+    def __init__(self, initial_balance: float):
+        self.initial_balance = initial_balance
+        self.balance = initial_balance
+        self.peak = initial_balance
+        self.closed_history: List[Dict[str, Any]] = []
+        self.max_drawdown_amount = 0.0
+        self.max_drawdown_percent = 0.0
+        self._timestamps, self._balances, self._equities = [], [], []
+        self._size = 0
+        self._fold_ends: List[int] = []
+        self._fold_drawdowns: List[Tuple[float, float]] = []
+
+    def add(self, final_balance: float, closed_history: List[Dict[str, Any]],
+            timestamps: np.ndarray, balances: np.ndarray, equities: np.ndarray,
+            peak: float, max_drawdown_amount: float, max_drawdown_percent: float):
+        """Appends one fold: its broker's final balance, trades, per-bar curve and drawdown figures."""
+        # Each fold ran from the initial balance; shift it so it starts where the previous fold ended.
+        offset = self.balance - self.initial_balance
+        for trade in closed_history:
+            self.closed_history.append({**trade, 'ticket': len(self.closed_history) + 1})
+        self._timestamps.append(timestamps)
+        self._balances.append(balances + offset)
+        self._equities.append(equities + offset)
+        self.balance = final_balance + offset
+
+        # The fold's deepest point below the peak carried in, or its own worst drawdown from a
+        # peak it set itself, whichever is larger.
+        candidates = []
+        if len(equities):
+            candidates.append((self.peak - offset - float(equities.min()), self.peak))
+        if max_drawdown_amount > 0:
+            candidates.append((max_drawdown_amount, max_drawdown_amount / max_drawdown_percent * 100 + offset))
+        for amount, at_peak in candidates:
+            if amount > self.max_drawdown_amount:
+                self.max_drawdown_amount = amount
+                self.max_drawdown_percent = amount / at_peak * 100
+        self.peak = max(self.peak, peak + offset)
+
+        self._size += len(timestamps)
+        if len(timestamps):
+            self._fold_ends.append(self._size - 1)
+            self._fold_drawdowns.append((self.max_drawdown_amount, self.max_drawdown_percent))
+
+    def equity_curve(self) -> EquitySeries:
+        timestamps = np.concatenate(self._timestamps)
+        balances = np.concatenate(self._balances)
+        equities = np.concatenate(self._equities)
+
+        # Running drawdown over the bar closes; each fold's exact figure takes over at its last bar.
+        peaks = np.maximum.accumulate(np.maximum(equities, self.initial_balance))
+        drawdowns = peaks - equities
+        percents = np.divide(drawdowns * 100, peaks, out=np.zeros_like(drawdowns), where=peaks != 0)
+        for end, (amount, percent) in zip(self._fold_ends, self._fold_drawdowns):
+            if amount > drawdowns[end]:
+                drawdowns[end], percents[end] = amount, percent
+        running = np.maximum.accumulate(drawdowns)
+        is_new = drawdowns > np.r_[0.0, running[:-1]]
+        at = np.maximum.accumulate(np.where(is_new, np.arange(len(drawdowns)), 0))
+        dd_percent = np.where(running > 0, percents[at], 0.0)
+
+        return EquitySeries.from_columns(timestamps, balances, equities, dd_percent)
+
+
+def _optimize(fold: int, index: int, params: Dict[str, Any], settings: Dict[str, Any]):
+    broker, _ = sweep._run_lorentzian(params, sweep._worker_data, settings)
+    return fold, index, sweep.summarize(broker, settings['balance'])
+
+
+def _evaluate(fold: int, params: Dict[str, Any], settings: Dict[str, Any]):
+    broker, equity_curve = sweep._run_lorentzian(params, sweep._worker_data, settings)
+    columns = equity_curve.columns()
+    # Positions still open when the window ends are closed at its last bar, so the next fold starts flat.
+    last = sweep._worker_data[settings['timeframe']][settings['window'][1] - 1]
+    for pos in broker.get_positions():
+        broker.close_position(pos['ticket'], last.close, last.timestamp, "End of Window")
+    if len(columns['balance']):
+        columns['balance'][-1], columns['equity'][-1] = broker.balance, broker.equity
+    return fold, sweep.summarize(broker, settings['balance']), broker.balance, broker.closed_history, \
+        columns['timestamp'], columns['balance'], columns['equity'], \
+        broker.peak_balance, broker.max_drawdown_amount, broker.max_drawdown_percent
+
+
+def walk_forward(candles: List[Candle], param_sets: List[Dict[str, Any]], settings: Dict[str, Any],
+                 folds: int, in_sample_ratio: int = 3, rank_by: str = 'net_profit',
+                 workers: Optional[int] = None):
+    """Optimizes each fold in-sample, evaluates the winner out-of-sample and stitches the results.
+
+    All folds and parameter sets run in one process pool over a single shared copy of
+    ``candles``; folds only carry index windows into it. Returns the fold reports and
+    the stitched out-of-sample result with its equity curve.
+    """
+    timeframe = settings['timeframe']
+    sweep.validate_params(sweep.LorentzianClassificationAgent, param_sets)
+    plan = make_folds(len(candles), settings['warmup_candles'], folds, in_sample_ratio)
+    score = sweep.RANKINGS[rank_by]
+
+    block = sweep.SharedCandles.create(candles[0].symbol, candles)
+    best: Dict[int, Tuple] = {}
+    reports = {f.index: {'fold': f.index, 'train': f.train, 'test': f.test} for f in plan}
+    evaluations = {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=sweep._init_worker,
+                                 initargs=({timeframe: block},)) as pool:
+            # In-sample runs of every fold are scheduled together; a fold's out-of-sample run
+            # starts as soon as that fold's own optimization has finished.
+            pending = {f.index: len(param_sets) for f in plan}
+            futures = [pool.submit(_optimize, f.index, i, params, {**settings, 'window': f.train})
+                       for f in plan for i, params in enumerate(param_sets)]
+            evaluation_futures = []
+            for future in as_completed(futures):
+                fold, index, metrics = future.result()
+                candidate = (score(metrics), -index)
+                if fold not in best or candidate > best[fold][0]:
+                    best[fold] = (candidate, index, metrics)
+                pending[fold] -= 1
+                if pending[fold] == 0:
+                    params = param_sets[best[fold][1]]
+                    reports[fold].update(params=params, in_sample=best[fold][2])
+                    print(f"📐 Fold {fold}: best in-sample {rank_by}={best[fold][2][rank_by]:.2f} with {params}")
+                    evaluation_futures.append(pool.submit(_evaluate, fold, params,
+                                                          {**settings, 'window': plan[fold].test}))
+
+            for future in as_completed(evaluation_futures):
+                fold, metrics, *result = future.result()
+                reports[fold]['out_of_sample'] = metrics
+                evaluations[fold] = result
+    finally:
+        block.unlink()
+
+    stitched = StitchedResult(settings['balance'])
+    for fold in sorted(evaluations):
+        stitched.add(*evaluations[fold])
+    equity_curve = stitched.equity_curve()
+    return [reports[f.index] for f in plan], stitched, equity_curve
@@ -0,0 +1,81 @@
+from datetime import timezone as dt_timezone
+from typing import Any, Dict, Iterable, List, Sequence
+import numpy as np
+import pandas as pd
+from django.db import connection
+from django.utils import timezone
+from journal.models import Trade, EquityPoint
+
+
+def to_db_datetimes(values: Sequence[Any]) -> List[Any]:
+    """Naive wall-clock timestamps (datetimes or int64 ns) as the database expects them.
+
+    Does in one vectorized pass what ``make_aware`` plus Django's field adaptation do
+    per value: interpret them in the current time zone and, with USE_TZ, store as UTC.
+    """
+    stamps = pd.DatetimeIndex(np.asarray(values, dtype='datetime64[ns]'))
+    tz = timezone.get_current_timezone()
+    if str(tz) != 'UTC':
+        # Match make_aware (fold=0): repeated hours take the first (DST) occurrence and times
+        # inside a spring-forward gap keep the pre-transition offset, i.e. move one hour later.
+        stamps = stamps.tz_localize(tz, ambiguous=np.ones(len(stamps), dtype=bool),
+                                    nonexistent=pd.Timedelta(hours=1)).tz_convert('UTC').tz_localize(None)
+
+    if connection.vendor != 'sqlite':
+        return [ts.replace(tzinfo=dt_timezone.utc) for ts in stamps.to_pydatetime()]
+    # SQLite stores str(datetime): a space separator and microseconds only when non-zero.
+    text = np.char.replace(np.datetime_as_string(stamps.values, unit='us'), 'T', ' ')
+    whole = stamps.values.astype('datetime64[us]').astype(np.int64) % 1_000_000 == 0
+    text[whole] = np.char.partition(text[whole], '.')[:, 0]
+    return text.tolist()
+
+
+class BulkResultWriter:
+    """Writes a session's trades and equity points with raw ``executemany`` inserts.
+
+    Skips model instantiation entirely; rows are built column-wise from the broker's
+    trade records and an EquitySeries. Call inside ``transaction.atomic``.
+    """
+    BATCH_SIZE = 5000
+
+    def __init__(self, session_id: int):
+        self.session_id = session_id
+
+    @staticmethod
+    def _insert_sql(model, fields: List[str]) -> str:
+        columns = ", ".join(connection.ops.quote_name(model._meta.get_field(f).column) for f in fields)
+        placeholders = ", ".join(["%s"] * len(fields))
+        return f"INSERT INTO {connection.ops.quote_name(model._meta.db_table)} ({columns}) VALUES ({placeholders})"
+
+    def _executemany(self, sql: str, rows: Iterable[tuple]):
+        rows = list(rows)
+        with connection.cursor() as cursor:
+            for i in range(0, len(rows), self.BATCH_SIZE):
+                cursor.executemany(sql, rows[i:i + self.BATCH_SIZE])
+
+    def write_trades(self, trades: Iterable[Dict[str, Any]]) -> int:
+        trades = list(trades)
+        if not trades: return 0
+        fields = ['session', 'ticket', 'direction', 'entry_price', 'exit_price', 'sl', 'tp', 'volume',
+                  'gross_profit', 'net_profit', 'open_time', 'close_time', 'duration_minutes',
+                  'entry_reason', 'exit_reason']
+        open_times = to_db_datetimes([t['open_time'] for t in trades])
+        close_times = to_db_datetimes([t['close_time'] for t in trades])
+        self._executemany(self._insert_sql(Trade, fields), (
+            (self.session_id, t['ticket'], t['type'].name, t['entry_price'], t['exit_price'],
+             t.get('sl', 0.0), t.get('tp', 0.0), t['volume'], t['gross_profit'], t['net_profit'],
+             opened, closed, t['duration'], t['entry_reason'], t['exit_reason'])
+            for t, opened, closed in zip(trades, open_times, close_times)
+        ))
+        return len(trades)
+
+    def write_equity(self, equity_curve) -> int:
+        columns = equity_curve.columns()
+        n = len(columns['timestamp'])
+        if n == 0: return 0
+        fields = ['session', 'timestamp', 'balance', 'equity', 'drawdown_percent']
+        self._executemany(self._insert_sql(EquityPoint, fields), zip(
+            [self.session_id] * n, to_db_datetimes(columns['timestamp']), columns['balance'].tolist(),
+            columns['equity'].tolist(), columns['dd'].tolist()
+        ))
+        return n
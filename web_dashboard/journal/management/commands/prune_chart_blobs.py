@@ -0,0 +1,16 @@
+import sys
+from django.core.management.base import BaseCommand
+from django.conf import settings
+
+PROJECT_ROOT = str(settings.BASE_DIR.parent)
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from journal.backtest.chart_generator import prune_chart_blobs
+
+class Command(BaseCommand):
+    help = "Deletes chart tile payloads that no backtest session references any more"
+
+    def handle(self, *args, **kwargs):
+        deleted = prune_chart_blobs()
+        print(f"🧹 Removed {deleted} unreferenced chart payloads")
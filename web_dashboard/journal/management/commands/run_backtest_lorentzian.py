@@ -1,4 +1,5 @@
 import sys
+from datetime import timedelta
 from django.core.management.base import BaseCommand
 from django.conf import settings
 
@@ -6,17 +7,22 @@ PROJECT_ROOT = str(settings.BASE_DIR.parent)
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-from trader.executor.mt5_executor import MT5Executor
-from trader.domain.models import Candle
 from trader.agents.lorentzian_agent import LorentzianClassificationAgent
 from journal.backtest.virtual_broker import AdvancedVirtualBroker
 from journal.backtest.engine import UnifiedEngine
-from journal.backtest.utils import save_backtest_results
+from journal.backtest.sub_bars import SubBarFeed, TICKS
+from journal.backtest.utils import save_backtest_results, load_candles, sync_candles, sync_ticks, \
+    get_candle_store, get_signal_cache
 
 class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('--days', type=int, default=60)
         parser.add_argument('--tf', type=int, default=5)
+        parser.add_argument('--offline', action='store_true', help='Use the local candle store only')
+        parser.add_argument('--sub-bars', choices=['m1', 'ticks'], default=None,
+                            help='Resolve SL/TP inside bars that reach a level from stored M1 bars or ticks')
+        parser.add_argument('--signal-cache', action='store_true',
+                            help='Reuse stored agent signals when only broker settings changed')
 
     def handle(self, *args, **kwargs):
         symbol = "XAUUSD"
@@ -26,42 +32,61 @@ class Command(BaseCommand):
         spread = 0.15
         warmup_candles = 2000
 
-        mt5 = MT5Executor()
-        if not mt5.connect():
-            return
-
         trading_candles_count = days * (1440 // timeframe)
         total_fetch = trading_candles_count + warmup_candles
 
-        raw_data = mt5.get_historical_data_as_dict(symbol, timeframe, count=total_fetch)
-        mt5.shutdown()
+        all_candles = load_candles(symbol, {timeframe: total_fetch}, offline=kwargs.get('offline'))[timeframe]
 
-        if len(raw_data) < total_fetch:
+        if len(all_candles) < total_fetch:
+            print(f"⚠️ Only {len(all_candles)} of {total_fetch} candles available for {symbol} M{timeframe}")
             return
 
-        all_candles = [Candle(symbol=symbol, **d) for d in raw_data]
         training_data = all_candles[:warmup_candles]
         trading_data = all_candles[warmup_candles:]
 
         agent = LorentzianClassificationAgent("Lorentzian_BT", magic_number=5005)
-        agent.history = [{
-            'open': c.open, 'high': c.high, 'low': c.low,
-            'close': c.close, 'volume': c.volume, 'timestamp': c.timestamp
-        } for c in training_data]
+
+        sub_bars = None
+        if kwargs.get('sub_bars'):
+            store = get_candle_store()
+            sub_tf = TICKS if kwargs['sub_bars'] == 'ticks' else 1
+            if not kwargs.get('offline'):
+                if sub_tf == TICKS:
+                    sync_ticks(store, symbol, trading_data[0].timestamp,
+                               trading_data[-1].timestamp + timedelta(minutes=timeframe))
+                else:
+                    sync_candles(store, symbol, {1: days * 1440})
+            sub_bars = SubBarFeed(store, symbol, sub_tf)
+            if not len(sub_bars):
+                print(f"⚠️ No {kwargs['sub_bars']} data stored for {symbol}; using the 4-point bar path")
+                sub_bars = None
 
         broker = AdvancedVirtualBroker(
             initial_balance=balance,
             spread=spread,
             digits=2,
-            stop_level_points=10
+            stop_level_points=10,
+            sub_bars=sub_bars,
+            bar_minutes=timeframe
         )
         engine = UnifiedEngine(agent, broker)
 
+        def compute_signals():
+            agent.warm_up(training_data)
+            return agent.precompute_signals(trading_data)
+
+        if kwargs.get('signal_cache'):
+            signals = get_signal_cache().signals(agent, compute_signals, training_data, trading_data)
+        else:
+            signals = compute_signals()
         broker, equity_curve = engine.run(
             ltf_data=trading_data,
-            step_method='on_market_data'
+            signals=signals
         )
 
+        if sub_bars is not None:
+            print(f"🔬 Expanded {broker.sub_bar_expansions} of {len(trading_data)} bars into {kwargs['sub_bars']}")
+
         save_backtest_results(
             agent.name, symbol, f"M{timeframe}", balance, spread,
             trading_data, broker, equity_curve
@@ -1,3 +1,4 @@
+import os
 import sys
 from django.core.management.base import BaseCommand
 from django.conf import settings
@@ -6,50 +7,55 @@ PROJECT_ROOT = str(settings.BASE_DIR.parent)
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-from trader.executor.mt5_executor import MT5Executor
-from trader.domain.models import Candle
 from trader.agents.mtf_sfp_agent import MultiTimeframeSFPAgent
 from journal.backtest.virtual_broker import AdvancedVirtualBroker
 from journal.backtest.engine import UnifiedEngine
-from journal.backtest.utils import save_backtest_results
+from journal.backtest.sinks import EquitySeries, TradeLog
+from journal.backtest.utils import save_backtest_results, load_candles, get_signal_cache
 
 class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('--days', type=int, default=60)
+        parser.add_argument('--offline', action='store_true', help='Use the local candle store only')
+        parser.add_argument('--spill-dir', type=str, default=None,
+                            help='Stream the equity curve and closed trades to this directory instead of memory')
+        parser.add_argument('--signal-cache', action='store_true',
+                            help='Reuse stored agent signals when only broker settings changed')
 
     def handle(self, *args, **kwargs):
         symbol = "XAUUSD"
         days = kwargs.get('days', 60)
         balance = 10000.0
         spread = 0.15
+        spill_dir = kwargs.get('spill_dir')
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
 
-        mt5 = MT5Executor()
-        if not mt5.connect():
-            return
-
-        raw_ltf = mt5.get_historical_data_as_dict(symbol, 1, count=days * 1440)
-        raw_htf = mt5.get_historical_data_as_dict(symbol, 15, count=days * 100)
-        mt5.shutdown()
+        candles = load_candles(symbol, {1: days * 1440, 15: days * 100}, offline=kwargs.get('offline'))
+        ltf_candles, htf_candles = candles[1], candles[15]
 
-        if not raw_ltf or not raw_htf:
+        if not ltf_candles or not htf_candles:
             return
 
-        ltf_candles = [Candle(symbol=symbol, **d) for d in raw_ltf]
-        htf_candles = [Candle(symbol=symbol, **d) for d in raw_htf]
-
         agent = MultiTimeframeSFPAgent("SFP_Backtest", 888)
         broker = AdvancedVirtualBroker(
             initial_balance=balance,
             spread=spread,
             digits=2,
-            stop_level_points=10
+            stop_level_points=10,
+            closed_history=TradeLog(os.path.join(spill_dir, 'trades.pkl')) if spill_dir else None
         )
         engine = UnifiedEngine(agent, broker)
 
+        if kwargs.get('signal_cache'):
+            signals = get_signal_cache().signals(
+                agent, lambda: agent.precompute_signals(ltf_candles, htf_candles), ltf_candles, htf_candles)
+        else:
+            signals = agent.precompute_signals(ltf_candles, htf_candles)
         broker, equity_curve = engine.run(
             ltf_data=ltf_candles,
-            htf_data=htf_candles,
-            step_method='on_ltf_candle'
+            signals=signals,
+            equity_curve=EquitySeries(spill_dir=os.path.join(spill_dir, 'equity')) if spill_dir else None
         )
 
         save_backtest_results(
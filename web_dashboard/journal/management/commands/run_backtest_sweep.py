@@ -0,0 +1,84 @@
+import json
+import os
+import sys
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+
+PROJECT_ROOT = str(settings.BASE_DIR.parent)
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from journal.backtest.sweep import STRATEGIES, RANKINGS, grid, random_search, run_sweep
+from journal.backtest.utils import save_backtest_results, load_candles, get_signal_cache_dir
+
+class Command(BaseCommand):
+    help = "Backtests a parameter grid or random search across CPU cores and saves the best sessions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('strategy', choices=sorted(STRATEGIES))
+        parser.add_argument('--grid', type=str, help='JSON object of parameter -> list of values')
+        parser.add_argument('--random', type=str, help='JSON object of parameter -> list of choices or {"low", "high"}')
+        parser.add_argument('--samples', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--days', type=int, default=60)
+        parser.add_argument('--tf', type=int, default=5)
+        parser.add_argument('--workers', type=int, default=None)
+        parser.add_argument('--top-k', type=int, default=5)
+        parser.add_argument('--rank-by', choices=sorted(RANKINGS), default='net_profit')
+        parser.add_argument('--offline', action='store_true', help='Use the local candle store only')
+        parser.add_argument('--signal-cache', action='store_true',
+                            help='Reuse stored agent signals when only broker settings changed')
+
+    def handle(self, *args, **kwargs):
+        strategy = STRATEGIES[kwargs['strategy']]
+        if bool(kwargs['grid']) == bool(kwargs['random']):
+            raise CommandError("Pass exactly one of --grid or --random")
+        if kwargs['grid']:
+            param_sets = grid(json.loads(kwargs['grid']))
+        else:
+            param_sets = random_search(json.loads(kwargs['random']), kwargs['samples'], kwargs['seed'])
+
+        symbol = "XAUUSD"
+        run_settings = {
+            'balance': 10000.0,
+            'spread': 0.15,
+            'days': kwargs['days'],
+            'timeframe': kwargs['tf'],
+            'warmup_candles': 2000,
+            'signal_cache': get_signal_cache_dir() if kwargs.get('signal_cache') else None,
+        }
+
+        counts = strategy['counts'](run_settings)
+        data = load_candles(symbol, counts, offline=kwargs.get('offline'))
+        for tf, count in counts.items():
+            if len(data[tf]) < count:
+                print(f"⚠️ Only {len(data[tf])} of {count} candles available for {symbol} M{tf}")
+                return
+
+        print(f"🧪 Sweeping {len(param_sets)} {kwargs['strategy']} configurations...")
+        rows, top = run_sweep(kwargs['strategy'], param_sets, data, run_settings,
+                              workers=kwargs['workers'], top_k=kwargs['top_k'], rank_by=kwargs['rank_by'])
+
+        trading_data = strategy['trading_data'](run_settings, data)
+        base_name = strategy['agent'].__name__.replace('Agent', '')
+        for row, broker, equity_curve in top:
+            params = ", ".join(f"{k}={v}" for k, v in row['params'].items())
+            session = save_backtest_results(
+                f"{base_name} #{row['rank']} ({params})"[:100], symbol, strategy['timeframe'](run_settings),
+                run_settings['balance'], run_settings['spread'], trading_data, broker, equity_curve
+            )
+            row['session_id'] = session.id if session else None
+
+        out_dir = os.path.join(settings.BASE_DIR, 'media', 'sweeps')
+        os.makedirs(out_dir, exist_ok=True)
+        out_path = os.path.join(out_dir, f"{kwargs['strategy']}_{datetime.now():%Y%m%d_%H%M%S}.json")
+        with open(out_path, 'w') as f:
+            json.dump({'strategy': kwargs['strategy'], 'symbol': symbol, 'rank_by': kwargs['rank_by'],
+                       'settings': run_settings, 'runs': rows}, f, indent=2, default=str)
+
+        for row in rows[:max(kwargs['top_k'], 10)]:
+            print(f"#{row['rank']:<3} net={row['net_profit']:>10.2f}  trades={row['total_trades']:<4} "
+                  f"win={row['win_rate']:5.1f}%  dd={row['max_drawdown_percent']:5.2f}%  {row['params']}"
+                  + (f"  → session {row['session_id']}" if row.get('session_id') else ""))
+        print(f"📄 Ranked summary written to {out_path}")
@@ -0,0 +1,65 @@
+import json
+import sys
+from django.core.management.base import BaseCommand
+from django.conf import settings
+
+PROJECT_ROOT = str(settings.BASE_DIR.parent)
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from journal.backtest.sweep import RANKINGS, grid
+from journal.backtest.walk_forward import walk_forward
+from journal.backtest.utils import save_backtest_results, load_candles, get_signal_cache_dir
+
+class Command(BaseCommand):
+    help = "Rolling walk-forward optimization of the Lorentzian agent, saved as one stitched session"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=60)
+        parser.add_argument('--tf', type=int, default=5)
+        parser.add_argument('--folds', type=int, default=6)
+        parser.add_argument('--in-sample-ratio', type=int, default=3,
+                            help='In-sample window length as a multiple of the out-of-sample window')
+        parser.add_argument('--grid', type=str, default='{"neighbors_count": [4, 8, 12], "kernel_h": [4.0, 8.0, 12.0]}',
+                            help='JSON object of parameter -> list of values')
+        parser.add_argument('--rank-by', choices=sorted(RANKINGS), default='net_profit')
+        parser.add_argument('--workers', type=int, default=None)
+        parser.add_argument('--offline', action='store_true', help='Use the local candle store only')
+        parser.add_argument('--signal-cache', action='store_true',
+                            help='Reuse stored agent signals when only broker settings changed')
+
+    def handle(self, *args, **kwargs):
+        symbol = "XAUUSD"
+        timeframe = kwargs['tf']
+        run_settings = {
+            'balance': 10000.0,
+            'spread': 0.15,
+            'timeframe': timeframe,
+            'warmup_candles': 2000,
+            'signal_cache': get_signal_cache_dir() if kwargs.get('signal_cache') else None,
+        }
+
+        total_fetch = kwargs['days'] * (1440 // timeframe) + run_settings['warmup_candles']
+        candles = load_candles(symbol, {timeframe: total_fetch}, offline=kwargs.get('offline'))[timeframe]
+        if len(candles) < total_fetch:
+            print(f"⚠️ Only {len(candles)} of {total_fetch} candles available for {symbol} M{timeframe}")
+            return
+
+        param_sets = grid(json.loads(kwargs['grid']))
+        print(f"🧭 Walk-forward: {kwargs['folds']} folds x {len(param_sets)} configurations...")
+        reports, stitched, equity_curve = walk_forward(
+            candles, param_sets, run_settings, kwargs['folds'], kwargs['in_sample_ratio'],
+            rank_by=kwargs['rank_by'], workers=kwargs['workers'])
+
+        for r in reports:
+            oos = r.get('out_of_sample', {})
+            print(f"Fold {r['fold']}: {r.get('params')} | IS net={r['in_sample']['net_profit']:.2f} "
+                  f"| OOS net={oos.get('net_profit', 0.0):.2f} trades={oos.get('total_trades', 0)}")
+
+        test_start, test_end = reports[0]['test'][0], reports[-1]['test'][1]
+        session = save_backtest_results(
+            f"Lorentzian WF ({kwargs['folds']} folds)", symbol, f"M{timeframe}",
+            run_settings['balance'], run_settings['spread'], candles[test_start:test_end], stitched, equity_curve
+        )
+        print(f"📈 Stitched out-of-sample net profit: {stitched.balance - run_settings['balance']:.2f}"
+              + (f" → session {session.id}" if session else ""))
@@ -0,0 +1,24 @@
+import sys
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand
+from django.conf import settings
+
+PROJECT_ROOT = str(settings.BASE_DIR.parent)
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from journal.backtest.utils import get_candle_store, sync_ticks
+
+class Command(BaseCommand):
+    help = "Stores MetaTrader 5 ticks in the local candle store for --sub-bars ticks backtests"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--symbol', type=str, default="XAUUSD")
+        parser.add_argument('--days', type=int, default=60)
+
+    def handle(self, *args, **kwargs):
+        now = datetime.now()
+        # Candle time is the server's wall clock, which can run hours ahead of the local one.
+        start, end = now - timedelta(days=kwargs['days']), now + timedelta(days=1)
+        if not sync_ticks(get_candle_store(), kwargs['symbol'], start, end):
+            print("❌ Could not connect to MetaTrader 5")
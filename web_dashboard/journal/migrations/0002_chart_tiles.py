@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("journal", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChartBlob",
+            fields=[
+                (
+                    "digest",
+                    models.CharField(max_length=64, primary_key=True, serialize=False),
+                ),
+                ("bars", models.IntegerField()),
+                ("payload", models.BinaryField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ChartTile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("resolution", models.IntegerField()),
+                ("start_time", models.BigIntegerField()),
+                ("end_time", models.BigIntegerField()),
+                (
+                    "blob",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="tiles",
+                        to="journal.chartblob",
+                    ),
+                ),
+                (
+                    "session",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="chart_tiles",
+                        to="journal.backtestsession",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["session", "resolution", "start_time"],
+                        name="journal_cha_session_d665a5_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("journal", "0002_chart_tiles"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="backtestsession",
+            index=models.Index(
+                fields=["created_at", "id"], name="journal_bac_created_cfc144_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="backtestsession",
+            index=models.Index(
+                fields=["net_profit", "id"], name="journal_bac_net_pro_ab6281_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="backtestsession",
+            index=models.Index(
+                fields=["max_drawdown_percent", "id"],
+                name="journal_bac_max_dra_434a21_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="backtestsession",
+            index=models.Index(
+                fields=["agent_name", "id"], name="journal_bac_agent_n_b30b12_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="backtestsession",
+            index=models.Index(
+                fields=["symbol", "id"], name="journal_bac_symbol_e91f6d_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="backtestsession",
+            index=models.Index(
+                fields=["agent_name", "net_profit"],
+                name="journal_bac_agent_n_198930_idx",
+            ),
+        ),
+    ]
@@ -16,6 +16,17 @@ class BacktestSession(models.Model):
     total_trades = models.IntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Every dashboard sort key paired with id, so keyset pages are index range scans.
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['net_profit', 'id']),
+            models.Index(fields=['max_drawdown_percent', 'id']),
+            models.Index(fields=['agent_name', 'id']),
+            models.Index(fields=['symbol', 'id']),
+            models.Index(fields=['agent_name', 'net_profit']),
+        ]
+
 class Trade(models.Model):
     session = models.ForeignKey(BacktestSession, on_delete=models.CASCADE, related_name='trades')
     ticket = models.IntegerField()
@@ -40,6 +51,20 @@ class EquityPoint(models.Model):
     equity = models.FloatField()
     drawdown_percent = models.FloatField()
 
-class ChartData(models.Model):
-    session = models.OneToOneField(BacktestSession, on_delete=models.CASCADE, related_name='chart_data_cache')
-    payload = models.BinaryField()
\ No newline at end of file
+class ChartBlob(models.Model):
+    """Content-addressed tile payload, shared by every session whose candles produce the same block."""
+    digest = models.CharField(max_length=64, primary_key=True)
+    bars = models.IntegerField()
+    payload = models.BinaryField()
+
+
+class ChartTile(models.Model):
+    """One block of a session's chart pyramid at one resolution, pointing at its payload."""
+    session = models.ForeignKey(BacktestSession, on_delete=models.CASCADE, related_name='chart_tiles')
+    resolution = models.IntegerField()
+    start_time = models.BigIntegerField()
+    end_time = models.BigIntegerField()
+    blob = models.ForeignKey(ChartBlob, on_delete=models.PROTECT, related_name='tiles')
+
+    class Meta:
+        indexes = [models.Index(fields=['session', 'resolution', 'start_time'])]
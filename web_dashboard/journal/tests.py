@@ -1,3 +1,472 @@
-from django.test import TestCase
+import base64
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
 
-# Create your tests here.
+PROJECT_ROOT = str(settings.BASE_DIR.parent)
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+# The live-loop modules import their siblings the way trader/main.py runs them.
+TRADER_ROOT = os.path.join(PROJECT_ROOT, 'trader')
+if TRADER_ROOT not in sys.path:
+    sys.path.append(TRADER_ROOT)
+
+from trader.core.indicators import (TechnicalAnalysis, StreamingEMA, StreamingRSI, StreamingATR, StreamingCCI,
+                                     StreamingADX, StreamingWaveTrend)
+from trader.data.candle_store import CandleStore, candles_from_columns
+from trader.domain.models import Signal, SignalType, to_epoch_ns
+from trader.executor.replay_executor import ReplayExecutor
+from trader.agents.base import TradingAgent
+from trader.agents.lorentzian_agent import LorentzianClassificationAgent
+from trader.agents.mtf_sfp_agent import MultiTimeframeSFPAgent
+from core.engine import TradingEngine
+from core.scheduler import BarScheduler
+from journal.backtest.signal_cache import _dependencies
+from journal.backtest.walk_forward import StitchedResult
+from journal.backtest.chart_generator import export_tv_data, trade_markers
+from journal.backtest.engine import UnifiedEngine
+from journal.backtest.virtual_broker import AdvancedVirtualBroker
+from journal.models import BacktestSession, ChartBlob, Trade
+from journal.views import _encode_cursor
+
+START = datetime(2024, 1, 1)
+
+
+def random_walk(n: int, seed: int = 1, minutes: int = 1, start: datetime = START) -> dict:
+    """Deterministic OHLCV columns in the CandleStore schema."""
+    rng = np.random.default_rng(seed)
+    close = 2000 + np.cumsum(rng.normal(0, 1.5, n))
+    open_ = np.r_[close[0], close[:-1]] + rng.normal(0, 0.2, n)
+    return {
+        'timestamp': to_epoch_ns(start) + np.arange(n, dtype=np.int64) * minutes * 60 * 10 ** 9,
+        'open': open_.round(2),
+        'high': (np.maximum(open_, close) + np.abs(rng.normal(0, 1, n))).round(2),
+        'low': (np.minimum(open_, close) - np.abs(rng.normal(0, 1, n))).round(2),
+        'close': close.round(2),
+        'volume': rng.integers(50, 500, n).astype(float),
+    }
+
+
+def resample(columns: dict, factor: int) -> dict:
+    """Groups of ``factor`` consecutive bars merged into one, stamped with the first bar's time."""
+    n = len(columns['close']) // factor * factor
+    grouped = {name: column[:n].reshape(-1, factor) for name, column in columns.items()}
+    return {'timestamp': grouped['timestamp'][:, 0], 'open': grouped['open'][:, 0],
+            'high': grouped['high'].max(axis=1), 'low': grouped['low'].min(axis=1),
+            'close': grouped['close'][:, -1], 'volume': grouped['volume'].sum(axis=1)}
+
+
+class ReferenceBroker(AdvancedVirtualBroker):
+    """The broker's original per-position dict loops, kept as the oracle for the array book."""
+
+    def update_market_movement(self, candle):
+        if candle.close >= candle.open:
+            ticks = [candle.open, candle.low, candle.high, candle.close]
+        else:
+            ticks = [candle.open, candle.high, candle.low, candle.close]
+        for tick_price in ticks:
+            bid, ask = self.get_bid_ask(tick_price)
+            self._check_sl_tp(bid, ask, candle.timestamp)
+        final_bid, final_ask = self.get_bid_ask(candle.close)
+        self.update_equity(final_bid, final_ask)
+
+    def _check_sl_tp(self, bid, ask, timestamp):
+        for pos in self.get_positions():
+            exit_price, reason = None, ""
+            if pos['type'] == SignalType.BUY:
+                if pos['sl'] > 0 and bid <= pos['sl']:
+                    exit_price, reason = min(pos['sl'], bid), "SL"
+                elif pos['tp'] > 0 and bid >= pos['tp']:
+                    exit_price, reason = max(pos['tp'], bid), "TP"
+            else:
+                if pos['sl'] > 0 and ask >= pos['sl']:
+                    exit_price, reason = max(pos['sl'], ask), "SL"
+                elif pos['tp'] > 0 and ask <= pos['tp']:
+                    exit_price, reason = min(pos['tp'], ask), "TP"
+            if exit_price is not None:
+                self.close_position(pos['ticket'], exit_price, timestamp, reason, raw_price_provided=False)
+
+    def update_equity(self, current_bid, current_ask):
+        floating_pl = 0.0
+        for pos in self.get_positions():
+            if pos['type'] == SignalType.BUY:
+                floating_pl += (current_bid - pos['entry_price']) * pos['volume'] * self.contract_size
+            else:
+                floating_pl += (pos['entry_price'] - current_ask) * pos['volume'] * self.contract_size
+        self.equity = self.balance + floating_pl
+        self.free_margin = self.equity - self.margin
+        if self.equity > self.peak_balance:
+            self.peak_balance = self.equity
+        current_drawdown = self.peak_balance - self.equity
+        if current_drawdown > self.max_drawdown_amount:
+            self.max_drawdown_amount = current_drawdown
+            self.max_drawdown_percent = (current_drawdown / self.peak_balance) * 100
+
+
+class VirtualBrokerRegressionTests(SimpleTestCase):
+    def test_matches_reference_broker(self):
+        # Enough overlapping positions to exercise both the scalar and the vectorized equity paths.
+        candles = candles_from_columns('XAUUSD', random_walk(3000, seed=5))
+        rng = np.random.default_rng(5)
+        brokers = [AdvancedVirtualBroker(initial_balance=100000), ReferenceBroker(initial_balance=100000)]
+        curves, most_open = [[], []], 0
+        for candle in candles:
+            buy = rng.random() < 0.5
+            sl, tp = rng.uniform(2, 30, 2) * (1 if buy else -1)
+            close_one = rng.random() < 0.1
+            for broker, curve in zip(brokers, curves):
+                broker.update_market_movement(candle)
+                if close_one and broker.book.size:
+                    broker.close_position(broker.get_positions()[0]['ticket'], candle.close, candle.timestamp, "Manual")
+                broker.open_position(SignalType.BUY if buy else SignalType.SELL, 0.01, candle.close,
+                                     candle.close - sl, candle.close + tp, 'XAUUSD', 1, 'test', candle.timestamp)
+                curve.append((broker.balance, broker.equity, broker.max_drawdown_percent))
+            most_open = max(most_open, brokers[0].book.size)
+        new, reference = brokers
+        self.assertGreater(most_open, AdvancedVirtualBroker.VECTOR_MIN_POSITIONS)
+        self.assertEqual(curves[0], curves[1])
+        self.assertEqual(list(new.closed_history), list(reference.closed_history))
+
+
+class BatchSignalRegressionTests(SimpleTestCase):
+    """Batch signal paths must reproduce the streaming agents exactly."""
+
+    def test_sfp_batch_matches_streaming(self):
+        m1 = random_walk(30000, seed=7)
+        ltf = candles_from_columns('XAUUSD', m1)
+        htf = candles_from_columns('XAUUSD', resample(m1, 15))
+        for params in ({}, {'htf_pivot_len': 2, 'ltf_pivot_len': 1, 'max_choch_wait_candles': 200}):
+            agent = MultiTimeframeSFPAgent('SFP', 1).configure(**params)
+            streamed = []
+            step = agent.on_ltf_candle
+            agent.on_ltf_candle = lambda candle: streamed.append(step(candle)) or streamed[-1]
+            with contextlib.redirect_stdout(io.StringIO()):
+                UnifiedEngine(agent, AdvancedVirtualBroker()).run(ltf, htf, step_method='on_ltf_candle')
+            batch = MultiTimeframeSFPAgent('SFP', 1).configure(**params).precompute_signals(ltf, htf)
+            with self.subTest(**params):
+                self.assertTrue(any(streamed))
+                self.assertEqual(batch, streamed)
+
+    def test_lorentzian_batch_matches_streaming(self):
+        candles = candles_from_columns('XAUUSD', random_walk(2400, seed=11, minutes=5))
+        warmup, split = candles[:400], 1200
+        streaming = LorentzianClassificationAgent('L', 1)
+        streaming.warm_up(warmup)
+        with contextlib.redirect_stdout(io.StringIO()):
+            streamed = [streaming.on_market_data(c) for c in candles[400:]]
+        batch = LorentzianClassificationAgent('L', 1)
+        batch.warm_up(warmup)
+        signals = batch.precompute_signals(candles[400:split]) + batch.precompute_signals(candles[split:])
+        self.assertTrue(any(streamed))
+        self.assertEqual(signals, streamed)
+        # The batch path leaves the agent where streaming would have, so it can keep going.
+        np.testing.assert_array_equal(batch._store.features, streaming._store.features)
+        np.testing.assert_array_equal(batch.history.view('close'), streaming.history.view('close'))
+        self.assertEqual(batch.last_signal_type, streaming.last_signal_type)
+
+
+class ReplayExecutorTests(SimpleTestCase):
+    def setUp(self):
+        self.store = CandleStore(tempfile.mkdtemp())
+        self.columns = random_walk(600)
+        self.store.append('XAUUSD', 1, self.columns)
+        self.replay = ReplayExecutor(self.store, warmup_bars=100, spread=0.0)
+        self.replay.connect()
+
+    def _buy(self, sl: float, tp: float = 0.0):
+        self.replay.execute_order(Signal(agent_name='T', symbol='XAUUSD', signal_type=SignalType.BUY, price=0,
+                                         reason='test', magic_number=1, volume=0.01, stop_loss=sl,
+                                         take_profit=tp))
+
+    def test_open_positions_after_stop_hit(self):
+        entry = self.columns['open'][100]
+        self._buy(sl=entry - 1.0)
+        self._buy(sl=entry - 1000.0)
+        lows = self.columns['low'][100:]
+        hit = int(np.flatnonzero(lows <= entry - 1.0)[0])
+        self.replay.sleep((hit + 1) * 60)
+
+        positions = self.replay.get_open_positions()
+
+        self.assertEqual([p.sl for p in positions], [entry - 1000.0])
+        self.assertEqual([(c['exit_reason'], c['exit_price']) for c in self.replay.closed_positions],
+                         [('SL', entry - 1.0)])
+        self.assertEqual(self.replay.get_open_positions('EURUSD'), [])
+
+
+class TickSyncTests(SimpleTestCase):
+    class Terminal:
+        def __init__(self, timestamps):
+            self.timestamps = timestamps
+            self.requests = []
+
+        def get_ticks(self, symbol, start, end):
+            self.requests.append((start, end))
+            ts = self.timestamps
+            keep = (ts >= to_epoch_ns(start)) & (ts < to_epoch_ns(end))
+            return {'timestamp': ts[keep], 'bid': ts[keep] / 1e12, 'volume': np.ones(keep.sum())}
+
+    def test_sync_ticks_in_chunks_and_resume(self):
+        store = CandleStore(tempfile.mkdtemp())
+        ticks = to_epoch_ns(START) + np.sort(np.random.default_rng(3).integers(0, 86400 * 1000, 5000)) * 10 ** 6
+        terminal = self.Terminal(ticks)
+        half = START + timedelta(hours=12)
+
+        self.assertEqual(store.sync_ticks(terminal, 'XAUUSD', START, half), np.sum(ticks < to_epoch_ns(half)))
+        self.assertEqual(len(terminal.requests), 2)
+        store.sync_ticks(terminal, 'XAUUSD', START, START + timedelta(days=1))
+        # The second sync resumes from the newest stored tick, not from the requested start.
+        self.assertEqual(to_epoch_ns(terminal.requests[2][0]), ticks[ticks < to_epoch_ns(half)][-1])
+        stored = store.read('XAUUSD', CandleStore.TICKS)
+        np.testing.assert_array_equal(stored['timestamp'], ticks)
+        np.testing.assert_array_equal(stored['close'], ticks / 1e12)
+
+
+class BarSchedulerTests(SimpleTestCase):
+    def setUp(self):
+        self.store = CandleStore(tempfile.mkdtemp())
+        m1 = random_walk(24 * 60)
+        self.store.append('XAUUSD', 1, m1)
+        self.store.append('XAUUSD', 15, resample(m1, 15))
+
+    def test_start_mid_bar(self):
+        # Starting late into a bar must not leave the scheduler polling late for the rest of the run.
+        for second in (0, 30, 59):
+            replay = ReplayExecutor(self.store, start=START + timedelta(hours=10, seconds=second))
+            with contextlib.redirect_stdout(io.StringIO()):
+                replay.connect()
+            scheduler = BarScheduler(replay, clock=replay, stats_window=100)
+            lags = {1: [], 15: []}
+            for tf in (15, 1):
+                scheduler.subscribe('XAUUSD', tf, lambda candle, tf=tf: lags[tf].append(
+                    replay.time() - to_epoch_ns(candle.timestamp) / 1e9 - tf * 60))
+            end = replay.time() + 2 * 3600
+            scheduler.run(until=lambda: replay.time() > end)
+            with self.subTest(second=second):
+                self.assertEqual(len(lags[1]), 120)
+                self.assertEqual(len(lags[15]), 8)
+                self.assertLessEqual(max(lags[1] + lags[15]), scheduler.max_interval)
+                self.assertLessEqual(max(lags[1][5:] + lags[15][1:]), scheduler.min_interval + 1e-6)
+                self.assertLess(scheduler.round_trips, 5 * 128)
+                self.assertEqual(len(scheduler.detection_lags), 100)
+                self.assertLess(scheduler.stats()['detection_lag_ms_p95'], scheduler.max_interval * 1000)
+
+
+class SleepyAgent(TradingAgent):
+    def __init__(self, name: str, delay: float):
+        super().__init__(name, 1)
+        self.delay = delay
+        self.dropped = []
+        self.watch('XAUUSD')
+
+    def on_market_data(self, candle):
+        time.sleep(self.delay)
+        return Signal(agent_name=self.name, symbol=candle.symbol, signal_type=SignalType.BUY, price=candle.close,
+                      reason=str(candle.timestamp), magic_number=1, volume=0.01, stop_loss=0, take_profit=0)
+
+    def on_signal_dropped(self, signal):
+        self.dropped.append(signal.reason)
+
+
+class EngineTimeBudgetTests(SimpleTestCase):
+    def setUp(self):
+        self.candles = candles_from_columns('XAUUSD', random_walk(3))
+        self.engine = TradingEngine(workers=1, time_budget=0.3)
+        self.addCleanup(self.engine.shutdown)
+
+    def dispatch(self, candle):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return [order.agent_name for order in self.engine.dispatch('XAUUSD', 1, candle)]
+
+    def test_budget_is_per_agent(self):
+        # Together they exceed the budget, but each call on the shared worker is within it.
+        for name in ('A', 'B'):
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.engine.register_agent(SleepyAgent(name, 0.2))
+        self.assertEqual(self.dispatch(self.candles[0]), ['A', 'B'])
+
+    def test_dropped_agents_are_told(self):
+        slow, queued = SleepyAgent('slow', 0.6), SleepyAgent('queued', 0.0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.engine.register_agent(slow)
+            self.engine.register_agent(queued)
+        self.assertEqual(self.dispatch(self.candles[0]), [])
+        slow.delay = 0.0
+        # The first call is still running, so the next bar is queued behind it.
+        self.assertEqual(self.dispatch(self.candles[1]), [])
+        time.sleep(0.4)
+        self.assertEqual(self.dispatch(self.candles[2]), ['slow', 'queued'])
+        dropped = [str(candle.timestamp) for candle in self.candles[:2]]
+        self.assertEqual(slow.dropped, dropped)
+        self.assertEqual(queued.dropped, dropped)
+
+
+class IndicatorParityTests(SimpleTestCase):
+    """The streaming indicators must reproduce the pandas_ta values, warm-up NaNs included."""
+
+    def setUp(self):
+        self.df = pd.DataFrame(random_walk(1500, seed=3, minutes=5))
+
+    def assertMatches(self, streamed, expected):
+        np.testing.assert_allclose(np.array(streamed), expected.to_numpy(), rtol=1e-8, atol=1e-8, equal_nan=True)
+
+    def test_close_indicators(self):
+        df = self.df
+        TechnicalAnalysis.add_ema(df, 50, column_name='ema')
+        TechnicalAnalysis.add_rsi(df, 14, 'rsi')
+        ema, rsi = StreamingEMA(50), StreamingRSI(14)
+        self.assertMatches([ema.update(c) for c in df['close']], df['ema'])
+        self.assertMatches([rsi.update(c) for c in df['close']], df['rsi'])
+
+    def test_bar_indicators(self):
+        df = self.df
+        TechnicalAnalysis.add_atr(df, 14, 'atr')
+        TechnicalAnalysis.add_cci(df, 20, 'cci')
+        TechnicalAnalysis.add_adx_value(df, 20, 'adx')
+        TechnicalAnalysis.add_wavetrend(df, 10, 21, 'wt')
+        bars = list(zip(df['high'], df['low'], df['close']))
+        for column, indicator in (('atr', StreamingATR(14)), ('cci', StreamingCCI(20)), ('adx', StreamingADX(20)),
+                                  ('wt', StreamingWaveTrend(10, 21))):
+            with self.subTest(column):
+                self.assertMatches([indicator.update(*bar) for bar in bars], df[column])
+
+    def test_ema_seed_and_gaps(self):
+        # NaNs inside the seed window count as zero; later gaps decay the previous value.
+        df = self.df
+        df['gappy'] = df['close']
+        df.loc[:5, 'gappy'] = np.nan
+        df.loc[300:303, 'gappy'] = np.nan
+        TechnicalAnalysis.add_ema(df, 20, source='gappy', column_name='ema')
+        ema = StreamingEMA(20)
+        self.assertMatches([ema.update(x) for x in df['gappy']], df['ema'])
+
+
+class LorentzianAgentTests(SimpleTestCase):
+    def test_configure_rejects_too_short_history(self):
+        agent = LorentzianClassificationAgent('L', 1)
+        with self.assertRaisesRegex(ValueError, 'max_bars_back=50'):
+            agent.configure(max_bars_back=50)
+        self.assertEqual(agent.max_bars_back, 2000)
+        self.assertGreater(agent._store.capacity, agent.neighbors_count)
+
+    def test_dropped_signal_restores_side(self):
+        candles = candles_from_columns('XAUUSD', random_walk(1200, seed=11, minutes=5))
+        agent = LorentzianClassificationAgent('L', 1)
+        agent.warm_up(candles[:400])
+        with contextlib.redirect_stdout(io.StringIO()):
+            for candle in candles[400:]:
+                before = agent.last_signal_type
+                signal = agent.on_market_data(candle)
+                if signal:
+                    break
+        self.assertIsNotNone(signal)
+        agent.on_signal_dropped(signal)
+        self.assertEqual(agent.last_signal_type, before)
+
+
+class StitchedResultTests(SimpleTestCase):
+    def test_drawdown_spans_folds_and_intrabar_points(self):
+        stitched = StitchedResult(1000.0)
+        ts = np.arange(3, dtype=np.int64)
+        # Fold 1 ends 100 up after a peak of 1200 that only an intrabar update saw (drawdown 200).
+        stitched.add(1100.0, [], ts, np.full(3, 1000.0), np.array([1050.0, 1150.0, 1100.0]),
+                     peak=1200.0, max_drawdown_amount=200.0, max_drawdown_percent=200 / 1200 * 100)
+        self.assertEqual((stitched.max_drawdown_amount, stitched.peak), (200.0, 1200.0))
+        # Fold 2 is shifted up by 100 and dips to 950: 250 below the carried peak beats its own 150.
+        stitched.add(1000.0, [], ts + 3, np.full(3, 1000.0), np.array([990.0, 850.0, 1000.0]),
+                     peak=1000.0, max_drawdown_amount=150.0, max_drawdown_percent=15.0)
+        self.assertEqual(stitched.max_drawdown_amount, 250.0)
+        self.assertAlmostEqual(stitched.max_drawdown_percent, 250 / 1200 * 100)
+        self.assertEqual(stitched.balance, 1100.0)
+        self.assertAlmostEqual(stitched.equity_curve().columns()['dd'][-1], stitched.max_drawdown_percent)
+
+
+class SignalCacheTests(SimpleTestCase):
+    def test_key_covers_core_modules(self):
+        self.assertLessEqual({'trader.agents.lorentzian_agent', 'trader.core.indicators', 'trader.core.knn'},
+                             set(_dependencies(LorentzianClassificationAgent.__module__)))
+        self.assertIn('trader.core.pivots', _dependencies(MultiTimeframeSFPAgent.__module__))
+
+
+def create_session(net_profit: float = 0.0) -> BacktestSession:
+    start = START.replace(tzinfo=timezone.utc)
+    return BacktestSession.objects.create(
+        agent_name='Lorentzian', symbol='XAUUSD', timeframe='M5', initial_balance=10000, spread_points=0.15,
+        start_date=start, end_date=start + timedelta(days=1), final_balance=10000 + net_profit, net_profit=net_profit,
+        win_rate=50, max_drawdown_percent=1, max_drawdown_amount=100, total_trades=10)
+
+
+class ChartExportTests(TestCase):
+    def test_markers_sharing_a_second_are_nudged_apart(self):
+        trades = [{'type': SignalType.BUY, 'open_time': START, 'close_time': START + timedelta(minutes=5),
+                   'net_profit': 10.0, 'ticket': ticket} for ticket in (1, 2)]
+        times = [m['time'] for m in trade_markers(trades)]
+        self.assertEqual(len(set(times)), 4)
+        self.assertEqual(times, sorted(times))
+
+    def test_reexport_drops_only_replaced_payloads(self):
+        first, second = create_session(), create_session()
+        shared = candles_from_columns('XAUUSD', random_walk(3000, minutes=1))
+        export_tv_data(first.id, shared)
+        export_tv_data(second.id, shared)
+        kept = set(ChartBlob.objects.values_list('digest', flat=True))
+
+        export_tv_data(second.id, candles_from_columns('XAUUSD', random_walk(3000, seed=2, minutes=1)))
+        self.assertLessEqual(kept, set(ChartBlob.objects.values_list('digest', flat=True)))
+        export_tv_data(first.id, candles_from_columns('XAUUSD', random_walk(3000, seed=2, minutes=1)))
+        self.assertFalse(kept & set(ChartBlob.objects.values_list('digest', flat=True)))
+
+    def test_chart_window(self):
+        session = create_session()
+        export_tv_data(session.id, candles_from_columns('XAUUSD', random_walk(6000, minutes=1)))
+        for hour in (1, 50):
+            opened = (START + timedelta(hours=hour)).replace(tzinfo=timezone.utc)
+            Trade.objects.create(session=session, ticket=hour, direction='BUY', entry_price=1, exit_price=2,
+                                 volume=0.01, gross_profit=1, net_profit=1, open_time=opened,
+                                 close_time=opened + timedelta(minutes=30), duration_minutes=30)
+        url = reverse('session_chart_data', args=[session.id])
+        start = to_epoch_ns(START) // 10 ** 9
+
+        whole = self.client.get(url).json()
+        self.assertEqual(whole['levels'], [1, 5, 15, 60, 240, 1440])
+        self.assertEqual(whole['resolution'], 5)
+        self.assertEqual(len(whole['markers_data']), 4)
+
+        window = self.client.get(url, {'from': start, 'to': start + 3 * 3600, 'resolution': 1}).json()
+        self.assertEqual(window['resolution'], 1)
+        self.assertEqual(len(window['tiles']), 1)
+        self.assertEqual([m['text'] for m in window['markers_data']], ['ENTRY #1', 'EXIT $1.00'])
+        self.assertEqual(self.client.get(url, {'resolution': 10}).json()['resolution'], 15)
+        self.assertEqual(self.client.get(url, {'from': 'x'}).status_code, 400)
+
+
+class DashboardCursorTests(TestCase):
+    def setUp(self):
+        for i in range(3):
+            create_session(net_profit=i)
+
+    def _get(self, cursor, sort='net_profit'):
+        return self.client.get(reverse('dashboard'), {'sort': sort, 'after': cursor})
+
+    def test_valid_cursor(self):
+        for sort, field in (('net_profit', 'net_profit'), ('created', 'created_at'), ('agent', 'agent_name')):
+            last = BacktestSession.objects.order_by('id').last()
+            with self.subTest(sort):
+                self.assertEqual(self._get(_encode_cursor(getattr(last, field), last.id), sort).status_code, 200)
+
+    def test_malformed_cursor_is_rejected(self):
+        for sort, raw in (('net_profit', '["x", 1]'), ('net_profit', '[{"a": 1}, 1]'), ('net_profit', '[1, "y"]'),
+                          ('net_profit', '[1, 1e400]'), ('created', '["not a date", 1]'), ('created', '[5, 1]'),
+                          ('agent', '[["a"], 1]'), ('net_profit', '[1]'), ('net_profit', 'not json')):
+            cursor = base64.urlsafe_b64encode(raw.encode()).decode()
+            with self.subTest(raw):
+                self.assertEqual(self._get(cursor, sort).status_code, 400)
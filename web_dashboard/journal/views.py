@@ -1,17 +1,129 @@
+import base64
+import json
 import sys
-import zlib
+from datetime import datetime, timezone
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Avg, Count, F, IntegerField, Max, Min, OuterRef, Q, StdDev, Subquery, Value
+from django.db.models.functions import Floor, Least
 from django.shortcuts import render, get_object_or_404
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotModified, JsonResponse
 
-PROJECT_ROOT = r"G:\Trading-System"
+PROJECT_ROOT = str(settings.BASE_DIR.parent)
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-from .models import BacktestSession, ChartData
+from .models import BacktestSession, ChartBlob, ChartTile, Trade
+from .backtest.chart_generator import trade_markers
+from .backtest.chart_pyramid import MAX_BARS
+
+# Dashboard sort keys -> (model field, default direction). Ties break on id in the same direction.
+SESSION_SORTS = {
+    'created': ('created_at', 'desc'),
+    'net_profit': ('net_profit', 'desc'),
+    'drawdown': ('max_drawdown_percent', 'asc'),
+    'agent': ('agent_name', 'asc'),
+    'symbol': ('symbol', 'asc'),
+}
+SESSION_FILTERS = ('agent_name', 'symbol', 'timeframe')
+PAGE_SIZE = 50
+
+
+def _encode_cursor(value, pk) -> str:
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime) else value, pk])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str, field: str):
+    """Inverse of ``_encode_cursor``. Values are coerced to the sort field's type, so a forged
+    cursor fails here instead of inside the query."""
+    value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    model_field = BacktestSession._meta.get_field(field)
+    if model_field.get_internal_type() == 'CharField':
+        if not isinstance(value, str):
+            raise ValueError(f"cursor value for {field} must be a string")
+    else:
+        value = model_field.to_python(value)
+    if value is None or type(pk) is not int or not 0 < pk < 2 ** 63:
+        raise ValueError("malformed page cursor")
+    return value, pk
+
+
+def _filtered_sessions(request):
+    filters = {name: request.GET[name] for name in SESSION_FILTERS if request.GET.get(name)}
+    return BacktestSession.objects.filter(**filters), filters
+
 
 def dashboard(request):
-    sessions = BacktestSession.objects.all().order_by('-created_at')
-    return render(request, 'journal/dashboard.html', {'sessions': sessions})
+    """Keyset-paginated session list: ``sort``/``dir`` pick the order, ``after`` is the last row's cursor."""
+    sort = request.GET.get('sort') if request.GET.get('sort') in SESSION_SORTS else 'created'
+    field, direction = SESSION_SORTS[sort]
+    direction = request.GET.get('dir') if request.GET.get('dir') in ('asc', 'desc') else direction
+    sessions, filters = _filtered_sessions(request)
+
+    cursor = request.GET.get('after')
+    if cursor:
+        try:
+            value, pk = _decode_cursor(cursor, field)
+        except (ValueError, TypeError, ValidationError):
+            return HttpResponseBadRequest("Invalid page cursor")
+        op = 'lt' if direction == 'desc' else 'gt'
+        sessions = sessions.filter(Q(**{f'{field}__{op}': value}) | Q(**{field: value, f'id__{op}': pk}))
+
+    prefix = '-' if direction == 'desc' else ''
+    page = list(sessions.order_by(f'{prefix}{field}', f'{prefix}id')[:PAGE_SIZE + 1])
+    next_cursor = None
+    if len(page) > PAGE_SIZE:
+        page = page[:PAGE_SIZE]
+        next_cursor = _encode_cursor(getattr(page[-1], field), page[-1].id)
+
+    return render(request, 'journal/dashboard.html', {
+        'sessions': page,
+        'sort': sort,
+        'dir': direction,
+        'filters': filters,
+        'next_cursor': next_cursor,
+        'agents': BacktestSession.objects.order_by('agent_name').values_list('agent_name', flat=True).distinct(),
+        'symbols': BacktestSession.objects.order_by('symbol').values_list('symbol', flat=True).distinct(),
+        'sorts': SESSION_SORTS,
+    })
+
+
+def session_aggregates(request):
+    """Best session per agent and net-profit distribution, computed in SQL over the filtered sessions."""
+    sessions, filters = _filtered_sessions(request)
+    try:
+        bins = min(max(int(request.GET.get('bins', 20)), 1), 200)
+    except ValueError:
+        return JsonResponse({"error": "bins must be an integer"}, status=400)
+
+    best = sessions.filter(agent_name=OuterRef('agent_name')).order_by('-net_profit', 'id')
+    agents = list(sessions.values('agent_name').annotate(
+        sessions=Count('id'),
+        best_net_profit=Max('net_profit'),
+        avg_net_profit=Avg('net_profit'),
+        avg_win_rate=Avg('win_rate'),
+        worst_drawdown=Max('max_drawdown_percent'),
+        best_session_id=Subquery(best.values('id')[:1]),
+    ).order_by('-best_net_profit'))
+
+    overall = sessions.aggregate(
+        sessions=Count('id'), min=Min('net_profit'), max=Max('net_profit'), mean=Avg('net_profit'),
+        stddev=StdDev('net_profit'), profitable=Count('id', filter=Q(net_profit__gt=0)),
+        avg_drawdown=Avg('max_drawdown_percent'),
+    )
+
+    histogram = []
+    if overall['sessions']:
+        low, width = overall['min'], (overall['max'] - overall['min']) / bins or 1.0
+        # Bucket index in SQL; the maximum itself falls into the last bucket.
+        bucket = Least(Floor((F('net_profit') - low) / width), Value(bins - 1), output_field=IntegerField())
+        counts = dict(sessions.annotate(bucket=bucket).values_list('bucket').annotate(n=Count('id')).values_list('bucket', 'n'))
+        histogram = [{'from': low + i * width, 'to': low + (i + 1) * width, 'count': counts.get(i, 0)}
+                     for i in range(bins)]
+
+    return JsonResponse({"filters": filters, "overall": overall, "agents": agents, "net_profit_histogram": histogram})
+
 
 def session_detail(request, session_id):
     session = get_object_or_404(BacktestSession, pk=session_id)
@@ -21,16 +133,77 @@ def session_detail(request, session_id):
         'trades': trades
     })
 
+def _int_param(request, name):
+    value = request.GET.get(name)
+    return int(value) if value not in (None, '') else None
+
+
 def session_chart_data(request, session_id):
+    """One window of the session chart: tile spans of a single pyramid level, plus the trade markers under them.
+
+    ``from``/``to`` (epoch seconds) bound the window, the whole session by default. ``resolution`` (minutes)
+    is served by the nearest stored level at or above it; without it, the finest level that fits the window
+    into ``MAX_BARS`` bars. Tiles come as ``[digest, start, end, bars]`` and their bars from ``chart_blob``.
+    """
     try:
-        chart_obj = ChartData.objects.get(session_id=session_id)
-        payload_bytes = bytes(chart_obj.payload)
-        raw_json_bytes = zlib.decompress(payload_bytes)
-        return HttpResponse(raw_json_bytes, content_type='application/json')
-    except ChartData.DoesNotExist:
-        return JsonResponse({"chart_data": [], "volume_data": [], "markers_data": []})
-    except Exception as e:
-        import traceback
-        print(f"❌ API Error: {e}")
-        print(traceback.format_exc())
-        return JsonResponse({"error": str(e)}, status=500)
\ No newline at end of file
+        start, end, requested = (_int_param(request, name) for name in ('from', 'to', 'resolution'))
+    except ValueError:
+        return JsonResponse({"error": "from, to and resolution must be integers"}, status=400)
+
+    session_tiles = ChartTile.objects.filter(session_id=session_id)
+    levels = sorted(set(session_tiles.values_list('resolution', flat=True)))
+    if not levels:
+        return JsonResponse({"levels": [], "tiles": [], "markers_data": []})
+
+    extent = session_tiles.filter(resolution=levels[0]).aggregate(first=Min('start_time'), last=Max('end_time'))
+    session_start, session_end = extent['first'], extent['last'] + levels[0] * 60 - 1
+    start = session_start if start is None else start
+    end = session_end if end is None else end
+    if requested is not None:
+        resolution = next((level for level in levels if level >= requested), levels[-1])
+    else:
+        resolution = next((level for level in levels if (end - start) / (level * 60) <= MAX_BARS), levels[-1])
+
+    tiles = [list(row) for row in session_tiles.filter(
+        resolution=resolution, end_time__gte=start, start_time__lte=end).order_by('start_time').values_list(
+        'blob_id', 'start_time', 'end_time', 'blob__bars')]
+    # A fixed fine resolution over a wide window keeps only the tiles nearest its middle.
+    middle = (start + end) / 2
+    while len(tiles) > 2 and sum(tile[3] for tile in tiles) > 2 * MAX_BARS:
+        if middle - tiles[0][2] > tiles[-1][1] - middle:
+            tiles.pop(0)
+        else:
+            tiles.pop()
+
+    markers = []
+    if tiles:
+        # Markers cover the bars actually sent, like the tiles.
+        start, end = max(start, tiles[0][1]), min(end, tiles[-1][2] + resolution * 60 - 1)
+        lo, hi = (datetime.fromtimestamp(t, tz=timezone.utc) for t in (start, end))
+        trades = Trade.objects.filter(session_id=session_id).filter(
+            Q(open_time__range=(lo, hi)) | Q(close_time__range=(lo, hi)))
+        markers = trade_markers(trades, start, end)
+
+    return JsonResponse({
+        "levels": levels,
+        "max_bars": MAX_BARS,
+        "start": session_start,
+        "end": session_end,
+        "resolution": resolution,
+        "from": start,
+        "to": end,
+        "tiles": tiles,
+        "markers_data": markers,
+    })
+
+
+def chart_blob(request, digest):
+    """A tile payload's stored gzip bytes, sent as is. The URL is its content hash, so it never changes."""
+    if request.headers.get('If-None-Match') == f'"{digest}"':
+        return HttpResponseNotModified()
+    payload = get_object_or_404(ChartBlob, pk=digest).payload
+    response = HttpResponse(bytes(payload), content_type='application/octet-stream')
+    response['Content-Encoding'] = 'gzip'
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response['ETag'] = f'"{digest}"'
+    return response
@@ -77,6 +77,17 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # WAL lets readers (the dashboard) run while a backtest writes; IMMEDIATE transactions
+        # take the write lock up front so concurrent savers queue on the timeout instead of
+        # failing with "database is locked" on lock upgrade.
+        "OPTIONS": {
+            "init_command": "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA temp_store=MEMORY;",
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 30,
+        },
+        # Keep connections (and the pragmas set on them) across requests instead of reopening per request.
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
@@ -3,6 +3,8 @@ from journal import views
 
 urlpatterns = [
     path('', views.dashboard, name='dashboard'),
+    path('api/aggregates/', views.session_aggregates, name='session_aggregates'),
     path('session/<int:session_id>/', views.session_detail, name='session_detail'),
     path('session/<int:session_id>/chart-data/', views.session_chart_data, name='session_chart_data'),
+    path('chart-blob/<slug:digest>/', views.chart_blob, name='chart_blob'),
 ]
\ No newline at end of file